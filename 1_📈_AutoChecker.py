@@ -3,8 +3,9 @@ import ast
 import streamlit as st
 import warnings
 import os
-from dataloader import DataLoader
+from dataloader import SUBMISSION_FORMATS, DataLoader
 from check import Check
+from reporters import StreamlitReporter
 
 
 # Ignore warnings to prevent clutter
@@ -28,15 +29,34 @@ def display_optional_params():
             )
 
             # Convert input to appropriate data types if needed
-            if param in ("non-questions_columns", "penalty_params", "eval_formula"):
+            if param in (
+                "non-questions_columns",
+                "penalty_params",
+                "eval_formula",
+                "preload_modules",
+            ):
                 new_input_param = ast.literal_eval(new_input_param)
 
-            if param in ("force_download", "take_first_submission") and isinstance(
-                new_input_param, str
-            ):
+            if param in (
+                "force_download",
+                "take_first_submission",
+                "invalidate_cache",
+                "result_cache",
+                "warm_runner",
+                "install_missing",
+            ) and isinstance(new_input_param, str):
                 # Convert 'true' or 'false' strings to boolean values
                 new_input_param = new_input_param.lower() == "true"
 
+            if param in (
+                "workers",
+                "download_workers",
+                "download_retries",
+                "runner_workers",
+                "max_attempts",
+            ) and isinstance(new_input_param, str):
+                new_input_param = int(new_input_param) if new_input_param else None
+
             # Update user inputs with the new value
             dataloader.user_inputs[param] = new_input_param
 
@@ -54,9 +74,16 @@ def change_col_names():
 # Function to perform checking on data (cached for performance)
 @st.cache_data(show_spinner=False)
 def perform_checking(data, sub, usr):
-    # Initialize the checker and perform checks
-    checker = Check(data, sub, usr)
+    # Initialize the checker and perform checks, reusing results of unchanged cells
+    checker = Check(
+        data,
+        sub,
+        usr,
+        previous=st.session_state.get("checker"),
+        reporter=StreamlitReporter(),
+    )
     checker.check_submissions()
+    st.session_state["checker"] = checker
     return checker.result
 
 
@@ -77,7 +104,9 @@ col1, col2 = st.columns(2)
 with col1:
     config_file = st.file_uploader("Upload config file", type=["yaml", "yml"])
 with col2:
-    submissions_file = st.file_uploader("Upload submissions file", type="xlsx")
+    submissions_file = st.file_uploader(
+        "Upload submissions file", type=list(SUBMISSION_FORMATS)
+    )
 
 # Check if both files are uploaded
 if not config_file or not submissions_file:
@@ -89,7 +118,7 @@ if not config_file or not submissions_file:
 # ===========================
 
 # Load data
-dataloader = DataLoader(config_file, submissions_file)
+dataloader = DataLoader(config_file, submissions_file, reporter=StreamlitReporter())
 
 # Get user inputs for 'name' and 'id' columns
 col1, col2 = st.columns(2)
@@ -151,6 +180,12 @@ with st.expander("Questions for checking", expanded=True):
     )
 questions_data_df = questions_data_df.T
 dataloader.questions_data_df = questions_data_df
+
+# Report unknown check methods and broken metadata before any checking starts
+config_errors = Check.validate_questions(questions_data_df)
+if config_errors:
+    st.error("\n\n".join(config_errors))
+    st.stop()
 # ===========================
 # Submissions and Results
 # ===========================
@@ -0,0 +1,126 @@
+"""
+Headless entry point of the checker, for cron jobs and CI runners:
+
+    python -m autocheck grade config.yml submissions.xlsx --workers 8 --out results.parquet
+"""
+
+import argparse
+import sys
+
+from executors import EXECUTOR_MODES
+from reporters import ConsoleReporter, NullReporter
+
+
+def grade(
+    config_file,
+    submissions_file,
+    workers=None,
+    executor=None,
+    match_list_file=None,
+    write_mode="outer",
+    reporter=None,
+):
+    """
+    Check the submissions as the Streamlit app does, with the settings of the config file.
+
+    Parameters:
+        config_file (str): YAML config file.
+        submissions_file (str): Submissions file, .xlsx, .csv, .parquet or .feather.
+        workers (int): Number of workers of the executor, the config value if None.
+        executor (str): "serial", "thread" or "process", the config value if None.
+        match_list_file (str): Excel matching list merged with the results, if any.
+        write_mode (str): How the matching list is merged: outer, inner, left or right.
+        reporter (Reporter): Frontend of the progress, nothing is reported if None.
+
+    Returns:
+        DataFrame: Results with the same columns as the ones written by the app.
+    """
+    # Heavy modules are imported only for grading, not for --help
+    from check import Check
+    from dataloader import DataLoader
+
+    reporter = reporter or NullReporter()
+    dataloader = DataLoader(config_file, submissions_file, reporter=reporter)
+    if workers is not None:
+        dataloader.user_inputs["workers"] = workers
+    if executor is not None:
+        dataloader.user_inputs["executor"] = executor
+    if match_list_file is not None:
+        dataloader.match_list_file = match_list_file
+        dataloader.match_list = dataloader.load_match_list()
+    dataloader.process_questions()
+
+    checker = Check(
+        dataloader.questions_data_df,
+        dataloader.submissions,
+        dataloader.user_inputs,
+        reporter=reporter,
+    )
+    checker.check_submissions()
+    dataloader.results = checker.result
+    dataloader.change_col_names()
+    return dataloader.merge_match_res(write_mode)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="autocheck", description="Check submissions without the Streamlit app."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    grade_parser = commands.add_parser("grade", help="Check submissions.")
+    grade_parser.add_argument("config", help="YAML config file.")
+    grade_parser.add_argument(
+        "submissions", help="Submissions file (xlsx, csv, parquet, feather)."
+    )
+    grade_parser.add_argument(
+        "--workers", type=int, help="Number of workers, overrides the config."
+    )
+    grade_parser.add_argument(
+        "--executor",
+        choices=EXECUTOR_MODES,
+        help="Executor of the checks, overrides the config.",
+    )
+    grade_parser.add_argument(
+        "--match-list", help="Excel matching list merged with the results."
+    )
+    grade_parser.add_argument(
+        "--write-mode",
+        choices=("outer", "inner", "left", "right"),
+        default="outer",
+        help="How the matching list is merged with the results.",
+    )
+    grade_parser.add_argument(
+        "--out",
+        help="Results file (xlsx, csv, parquet, feather, sqlite), printed if not given.",
+    )
+    grade_parser.add_argument(
+        "--quiet", action="store_true", help="Do not report the progress."
+    )
+    args = parser.parse_args(argv)
+
+    reporter = NullReporter() if args.quiet else ConsoleReporter()
+    try:
+        result = grade(
+            args.config,
+            args.submissions,
+            workers=args.workers,
+            executor=args.executor,
+            match_list_file=args.match_list,
+            write_mode=args.write_mode,
+            reporter=reporter,
+        )
+        if args.out:
+            from writers import write_table
+
+            write_table(result, args.out)
+            reporter.success(f"Results saved as {args.out}")
+        else:
+            print(result.to_string())
+    except (OSError, ValueError) as e:
+        print(f"autocheck: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""
+Timing and peak memory of the checking pipeline per stage, on synthetic cohorts.
+
+Runs the pipeline on a cohort of all check types and on one cohort per check type, and
+saves the results as JSON to track the throughput from release to release:
+
+    python benchmarks/bench_pipeline.py --students 500 --questions 5 --out bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+import dataloader
+from check import Check, run_check
+from cohort import CHECK_TYPES, make_cohort
+from dataloader import DataLoader
+
+# Stages of the pipeline in the order they run
+STAGES = (
+    "load",
+    "process_questions",
+    "compile",
+    "check_submissions",
+    "penalty",
+    "sum_points",
+)
+
+
+def measure(func, trace=False):
+    """
+    Run func once.
+
+    Returns:
+        tuple: (result of func, seconds, peak MiB of Python allocations or None).
+    """
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 2**20 if trace else None
+    finally:
+        if trace:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def run_pipeline(paths, executor="serial", workers=None, trace=False):
+    """
+    Run every stage of the pipeline on the cohort.
+
+    Returns:
+        tuple: (finished Check, {stage: (seconds, peak MiB)}).
+    """
+    # Parsed files are cached by content, every run must parse the file again
+    dataloader._parsed_tables.clear()
+    stages = {}
+    loader, *stages["load"] = measure(
+        lambda: DataLoader(paths["config"], paths["submissions"]), trace
+    )
+    loader.user_inputs["executor"] = executor
+    loader.user_inputs["workers"] = workers
+    _, *stages["process_questions"] = measure(loader.process_questions, trace)
+    checker, *stages["compile"] = measure(
+        lambda: Check(loader.questions_data_df, loader.submissions, loader.user_inputs),
+        trace,
+    )
+    _, *stages["check_submissions"] = measure(checker.check_submissions, trace)
+    _, *stages["penalty"] = measure(checker.penalty, trace)
+    # sum_points weights the scores in place, start again from the checked ones
+    checker.points = checker.scores.copy()
+    checker.integer_points = checker.integer_scores.copy()
+    _, *stages["sum_points"] = measure(checker.sum_points, trace)
+    return checker, stages
+
+
+def bench_check_one(checker, sample=20):
+    """Mean seconds of CheckOne.run per question, on a sample of the submissions."""
+    seconds = {}
+    for q, plan in checker.plans.items():
+        answers = checker.submissions[checker.questions_data[q]["Questions"]]
+        answers = answers.iloc[:sample]
+        start = time.perf_counter()
+        for i, answer in enumerate(answers):
+            run_check(answer, plan, f"bench_{q}_{i}")
+        seconds[q] = (time.perf_counter() - start) / max(len(answers), 1)
+    return seconds
+
+
+def bench_cohort(
+    folder, students, questions, check_types, repeat=1, memory=True, **kwargs
+):
+    """
+    Benchmark one cohort: the best time of repeat runs and the peak memory of a traced run.
+
+    Returns:
+        dict: Cohort size, timing and memory of every stage and checked cells per second.
+    """
+    paths = make_cohort(folder, students, questions, check_types, **kwargs)
+    runs = [run_pipeline(paths) for _ in range(repeat)]
+    seconds = {stage: min(stages[stage][0] for _, stages in runs) for stage in STAGES}
+    peaks = {}
+    if memory:
+        _, traced = run_pipeline(paths, trace=True)
+        peaks = {stage: traced[stage][1] for stage in STAGES}
+    checker = runs[-1][0]
+    cells = len(checker.submissions) * len(checker.plans)
+    check_one = bench_check_one(checker)
+    return {
+        "students": students,
+        "questions": questions,
+        "check_types": list(check_types),
+        "cells": cells,
+        "stages": {
+            stage: {"seconds": seconds[stage], "peak_mib": peaks.get(stage)}
+            for stage in STAGES
+        },
+        "cells_per_second": cells / seconds["check_submissions"],
+        "check_one_seconds": {
+            f"{q} ({checker.questions_data[q]['Check Type']})": value
+            for q, value in check_one.items()
+        },
+    }
+
+
+def metadata(args):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "args": vars(args),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--check-types", nargs="+", default=CHECK_TYPES)
+    parser.add_argument("--attempts", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--out", help="JSON file, printed if not given.")
+    parser.add_argument("--keep", help="Folder to keep the cohorts in.")
+    args = parser.parse_args(argv)
+
+    options = {
+        "repeat": args.repeat,
+        "memory": not args.no_memory,
+        "attempts": args.attempts,
+        "rows": args.rows,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = args.keep or tmp
+        report = {
+            "meta": metadata(args),
+            "pipeline": bench_cohort(
+                os.path.join(folder, "all"),
+                args.students,
+                args.questions,
+                tuple(args.check_types),
+                **options,
+            ),
+            "check_types": {
+                check_type: bench_cohort(
+                    os.path.join(folder, check_type),
+                    args.students,
+                    args.questions,
+                    (check_type,),
+                    **options,
+                )
+                for check_type in args.check_types
+            },
+        }
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    for name, result in [("all", report["pipeline"]), *report["check_types"].items()]:
+        print(f"{name}: {result['cells_per_second']:.0f} cells/s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
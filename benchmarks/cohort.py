@@ -0,0 +1,214 @@
+"""
+Synthetic cohorts for the benchmarks: a config, a submissions file and local files
+standing in for the files students link on Yandex Disk.
+
+    python benchmarks/cohort.py /tmp/cohort --students 1000 --questions 10
+"""
+
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yaml
+
+CHECK_TYPES = ("soft", "hard", "num", "code", "data")
+
+# Check type of the config of every kind of question
+CHAINS = {
+    "soft": "soft_threshlow_60",
+    "hard": "hard",
+    "num": "num",
+    "code": "code",
+    "data": "data",
+}
+
+SOFT_ANSWERS = ("Paris", "paris", "Pari", "Paris, France", "London", "")
+NUM_ANSWERS = ("3.14", "3.1416", "3", "3.2", "abc", " 3.14 ")
+
+TEST_FILE = """import unittest
+
+
+class TestFoo(unittest.TestCase):
+    def test_square(self):
+        self.assertEqual(foo(2), 4)
+
+    def test_negative(self):
+        self.assertEqual(foo(-3), 9)
+
+    def test_zero(self):
+        self.assertEqual(foo(0), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
+"""
+
+CODE_VARIANTS = (
+    "def foo(x):\n    return x * x\n",
+    "def foo(x):\n    return x ** 2\n",
+    "def foo(x):\n    return x + x\n",
+    "def foo(x):\n    return abs(x) * x\n",
+)
+
+DEADLINE = datetime(2024, 1, 15, 23, 59, 59)
+
+
+def _write_files(folder, rows, variants, rng):
+    os.makedirs(folder, exist_ok=True)
+    test_path = os.path.join(folder, "task")
+    with open(f"{test_path}.py", "w") as f:
+        f.write(TEST_FILE)
+    code_paths = []
+    for i, code in enumerate(CODE_VARIANTS):
+        path = os.path.join(folder, f"code_{i}.py")
+        with open(path, "w") as f:
+            f.write(code)
+        code_paths.append(path)
+
+    reference = pd.DataFrame(
+        {"a": np.arange(rows, dtype=np.float64), "b": rng.normal(size=rows)}
+    )
+    reference_path = os.path.join(folder, "reference.csv")
+    reference.to_csv(reference_path, index=False)
+    data_paths = []
+    for i in range(variants):
+        noise = rng.normal(scale=0.1 * i, size=(rows, 2))
+        path = os.path.join(folder, f"data_{i}.csv")
+        (reference + noise).to_csv(path, index=False)
+        data_paths.append(path)
+    return test_path, code_paths, reference_path, data_paths
+
+
+def make_cohort(
+    folder,
+    students=100,
+    questions=5,
+    check_types=CHECK_TYPES,
+    attempts=1,
+    rows=100,
+    variants=4,
+    file_format="xlsx",
+    seed=0,
+):
+    """
+    Write a synthetic cohort to the folder.
+
+    Parameters:
+        folder (str): Folder of the cohort, created if missing.
+        students (int): Number of students.
+        questions (int): Number of questions, their check types go round check_types.
+        check_types (tuple): Check types of the questions, from CHECK_TYPES.
+        attempts (int): Number of submissions of every student.
+        rows (int): Number of rows of the data files.
+        variants (int): Number of distinct data files submitted.
+        file_format (str): Format of the submissions file, "xlsx" or "csv".
+        seed (int): Seed of the answers.
+
+    Returns:
+        dict: Paths of the "config" and "submissions" files.
+    """
+    rng = np.random.default_rng(seed)
+    choice = random.Random(seed).choice
+    folder = os.path.abspath(folder)
+    test_path, code_paths, reference_path, data_paths = _write_files(
+        os.path.join(folder, "files"), rows, variants, rng
+    )
+
+    config_questions = {}
+    answers = {}
+    for j in range(questions):
+        check_type = check_types[j % len(check_types)]
+        q = f"q{j + 1}"
+        metadata = []
+        if check_type == "soft":
+            answer, options = "Paris", SOFT_ANSWERS
+        elif check_type == "hard":
+            answer, options = "Paris", SOFT_ANSWERS
+        elif check_type == "num":
+            answer, options = "3.14", NUM_ANSWERS
+        elif check_type == "code":
+            answer, options = test_path, code_paths
+            metadata = [{"code_names": ["foo"]}, {"code_types": ["function"]}]
+        else:
+            answer, options = reference_path, data_paths
+            metadata = [{"error_funcs": ["neg_mean_squared_error", "r2"]}]
+        config_questions[q] = {
+            "check": True,
+            "answer": answer,
+            "check_type": CHAINS[check_type],
+            "weight": 1,
+            "metadata": metadata,
+        }
+        answers[f"Question {j + 1} ({check_type})"] = options
+
+    records = []
+    for i in range(students):
+        for _ in range(attempts):
+            late = timedelta(minutes=int(rng.integers(-3 * 24 * 60, 24 * 60)))
+            record = {
+                "ID": f"student{i:06d}",
+                "Time": (DEADLINE + late).strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            for column, options in answers.items():
+                record[column] = choice(options)
+            records.append(record)
+    submissions = pd.DataFrame(records)
+    submissions_path = os.path.join(folder, f"submissions.{file_format}")
+    if file_format == "csv":
+        submissions.to_csv(submissions_path, index=False)
+    else:
+        submissions.to_excel(submissions_path, index=False)
+
+    config = {
+        "system_info": {
+            "non-questions_columns": ["ID", "Time"],
+            "name": "Benchmark",
+            "id": "ID",
+            "time": "Time",
+            "submission_folder": os.path.join(folder, "submissions"),
+            "penalty_params": [
+                {"penalty_formula": "soft"},
+                {"deadline_time": DEADLINE.strftime("%Y-%m-%d %H:%M:%S")},
+                {"duration": 1440},
+            ],
+            "executor": "serial",
+            "result_cache": False,
+        },
+        "questions": config_questions,
+    }
+    config_path = os.path.join(folder, "config.yml")
+    with open(config_path, "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    return {"config": config_path, "submissions": submissions_path}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("folder")
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--check-types", nargs="+", default=CHECK_TYPES)
+    parser.add_argument("--attempts", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--format", choices=("xlsx", "csv"), default="xlsx")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    paths = make_cohort(
+        args.folder,
+        args.students,
+        args.questions,
+        tuple(args.check_types),
+        args.attempts,
+        args.rows,
+        file_format=args.format,
+        seed=args.seed,
+    )
+    print(paths["config"])
+    print(paths["submissions"])
+
+
+if __name__ == "__main__":
+    main()
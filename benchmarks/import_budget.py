@@ -0,0 +1,107 @@
+"""
+Import time budget of the core checker.
+
+Imports every module in a fresh interpreter with `python -X importtime` and fails if
+one of them takes longer than the budget or loads a heavy dependency that must only be
+imported by the checks that need it:
+
+    python benchmarks/import_budget.py --budget-ms 1000
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose cold start is measured
+MODULES = ("check", "dataloader", "autocheck")
+
+# Dependencies loaded lazily by the checks, frontends and downloads that use them
+LAZY_MODULES = (
+    "sklearn",
+    "scipy",
+    "streamlit",
+    "yadisk",
+    "validators",
+    "fuzzywuzzy",
+    "rapidfuzz",
+)
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(module, python=sys.executable):
+    """
+    Import the module in a fresh interpreter.
+
+    Returns:
+        list: (self_us, cumulative_us, depth, name) of every imported module.
+    """
+    process = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Unable to import {module}:\n{process.stderr}")
+    times = []
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            times.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return times
+
+
+def measure(module, repeat=5, python=sys.executable):
+    """
+    Measure the cold start of the module, the best of repeat runs.
+
+    Returns:
+        tuple: (cumulative ms, slowest direct imports, lazy modules that were loaded).
+    """
+    best = None
+    for _ in range(repeat):
+        times = import_times(module, python)
+        # Imports of the module are listed before it, after the ones of site
+        end = max(i for i, t in enumerate(times) if t[2] == 0 and t[3] == module)
+        start = max((i for i, t in enumerate(times[:end]) if t[2] == 0), default=-1)
+        total = times[end][1]
+        if best is None or total < best[0]:
+            best = (total, times[start + 1 : end])
+    total, times = best
+    # Modules imported by the module itself, with everything they import
+    direct = sorted(((t[1], t[3]) for t in times if t[2] == 1), reverse=True)
+    loaded = sorted(
+        {t[3].split(".")[0] for t in times if t[3].split(".")[0] in LAZY_MODULES}
+    )
+    return total / 1000, [(us / 1000, name) for us, name in direct], loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--budget-ms", type=float, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        total, direct, loaded = measure(module, args.repeat)
+        status = "ok" if total <= args.budget_ms and not loaded else "FAIL"
+        failed |= status == "FAIL"
+        print(f"{module}: {total:.1f} ms (budget {args.budget_ms:g} ms) {status}")
+        for ms, name in direct[: args.top]:
+            print(f"    {ms:8.1f} ms  {name}")
+        if loaded:
+            print(f"    loaded eagerly: {', '.join(loaded)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,43 @@
 import pandas as pd
-from fuzzywuzzy import fuzz
 import sys
 import numpy as np
 import random, string
-from yadisk import YaDisk, Client
 import os
 import ast
-import subprocess
-import validators
+import hashlib
+import json
+import signal
 import re
-from sklearn.base import BaseEstimator
-import sklearn.metrics
-from sklearn.preprocessing import MinMaxScaler
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import shutil
 from datetime import datetime
-import streamlit as st
+from executors import run_tasks
+from reporters import NullReporter
+from result_cache import IGNORED_KWARGS, ResultCache, hash_path, make_key
+from downloader import download_extension, get_downloader, is_url
+from deps import install_missing, install_modules
+from sources import load_source, read_template
+from datafiles import read_reference, read_table, table_columns, table_format
+import metrics
+from metrics import get_metric
+from reducers import get_reducer
+from fuzzy import DEFAULT_FUZZY_BACKEND, wratio
+from penalties import penalty_coefficients
+from rules import apply_rules, compile_rules, rule_targets
+from runner import (
+    DEFAULT_PRELOAD,
+    TestRun,
+    get_pool,
+    run_test_subprocess,
+    warm_runner_available,
+)
+
+
+def __getattr__(name):
+    # IdentityTransformer is still importable from here, without importing sklearn early
+    if name == "IdentityTransformer":
+        return metrics.IdentityTransformer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def number_of_dec(s):
@@ -23,6 +45,29 @@ def number_of_dec(s):
     return res
 
 
+def min_max_scale(values, low=0, high=100):
+    """
+    Scale the values to the [low, high] range like sklearn's MinMaxScaler, NaN is kept.
+
+    Parameters:
+        values (ndarray): Scores of one question.
+        low (float): Lower bound of the range.
+        high (float): Upper bound of the range.
+
+    Returns:
+        ndarray: Scaled scores rounded to the decimals of the most precise one.
+    """
+    with np.errstate(invalid="ignore"):
+        data_min, data_max = np.nanmin(values), np.nanmax(values)
+    data_range = data_max - data_min
+    if not data_range >= 10 * np.finfo(np.float64).eps:
+        data_range = 1.0
+    scale = (high - low) / data_range
+    scaled = values * scale + (low - data_min * scale)
+    decimals = [number_of_dec(v) for v in scaled if np.isfinite(v)]
+    return np.round(scaled, np.max(decimals)) if decimals else scaled
+
+
 def isnumeric(s_):
     try:
         res = int(s_)
@@ -35,6 +80,85 @@ def isnumeric(s_):
             return False
 
 
+def parse_param(s_):
+    try:
+        return int(s_)
+    except ValueError:
+        return float(s_)
+
+
+def run_check(submission, plan, filename, prefetched=False):
+    """Check one submitted answer, module-level so it can be sent to worker processes."""
+    check = CheckOne(
+        submission,
+        plan.correct,
+        plan,
+        filename=filename,
+        prefetched=prefetched,
+        **plan.kwargs,
+    )
+    check.run()
+    return check.result, check.comment, check.test_report
+
+
+@dataclass
+class CheckPlan:
+    """Check chain of one question, parsed once and reused for every submission."""
+
+    config: str
+    correct: str = None
+    steps: list = field(default_factory=list)
+    kwargs: dict = field(default_factory=dict)
+
+    @staticmethod
+    def parse(config):
+        """
+        Parse the configuration string into a list of (method name, params) steps.
+        """
+        methods = config.split("_")
+        steps = []
+        unknown = []
+        i = 0
+        while i < len(methods):
+            method_name = methods[i]
+            if method_name not in CheckOne.methods:
+                unknown.append(method_name)
+            param_index = i + 1
+            param_list = []
+            while param_index < len(methods) and isnumeric(methods[param_index]):
+                param_list.append(parse_param(methods[param_index]))
+                param_index += 1
+            steps.append((method_name, param_list))
+            i = param_index
+        if unknown:
+            raise ValueError(f"Unknown method: {', '.join(unknown)}")
+        return steps
+
+    @classmethod
+    def compile(cls, config, correct=None, kwargs=None):
+        """
+        Build a plan from the configuration string, correct answer and merged kwargs.
+        """
+        if isinstance(config, cls):
+            return config
+        return cls(config, correct, cls.parse(config), dict(kwargs or {}))
+
+    @property
+    def batch(self):
+        """Whether every step has a vectorized version in BatchCheck."""
+        return all(method_name in BatchCheck.methods for method_name, _ in self.steps)
+
+    def correct_files(self):
+        """Test and reference files the steps of the plan check against."""
+        files = []
+        for method_name, _ in self.steps:
+            if method_name == "code":
+                files.append(f"{self.correct}.py")
+            elif method_name in ("project", "data"):
+                files.append(self.correct)
+        return files
+
+
 @dataclass
 class PackageName:
     module: str = None
@@ -52,7 +176,9 @@ class PackageName:
 class Check:
     """Performs checks on submitted answers and calculates scores."""
 
-    def __init__(self, questions_data, submissions, user_params):
+    def __init__(
+        self, questions_data, submissions, user_params, previous=None, reporter=None
+    ):
         """
         Initialize the Check class.
 
@@ -60,21 +186,45 @@ class Check:
             questions_data (dict): Question data.
             submissions (DataFrame): Submitted answers.
             user_params (dict): User-defined parameters.
+            previous (Check): Finished check of an earlier version of the data,
+                its results are reused for unchanged questions and submissions.
+            reporter (Reporter): Frontend of the progress, nothing is reported if None.
         """
         self.questions_data = questions_data
         self.submissions = submissions
         self.user_params = user_params
+        self.previous = previous
+        self.reporter = reporter or NullReporter()
         self.questions_results_params = {}
         self.result = pd.DataFrame()
+        # Raw scores of the (submission, question) cells, kept for the next incremental
+        # check, and the comments of the cells that have one by (question, row)
+        self.ids = pd.Index([])
+        self.questions = []
+        self.scores = np.empty((0, 0))
+        self.integer_scores = np.empty(0, dtype=bool)
+        self.comments = {}
+        # Scores after normalization and weighting, converted to the result at the end
+        self.points = np.empty((0, 0))
+        self.integer_points = np.empty(0, dtype=bool)
+        self.penalty_coefficients = np.empty(0)
+        self.total = np.empty(0, dtype=np.int_)
+        self.question_keys = {}
+        self.cell_keys = pd.DataFrame()
+        self.checked_cells = 0
+        # Per-test records of code/project checks by (question, submission id)
+        self.test_reports = {}
+        self.plans = self.compile_plans()
+        self.rules = compile_rules(user_params.get("eval_formula", []))
 
     @staticmethod
     def convert_metadata(metadata):
         """Convert metadata from string to dictionaries."""
         return [ast.literal_eval(i) for i in metadata]
 
-    def gen_kwargs(self, metadata):
-        """Generate keyword arguments from metadata."""
-        kwargs = self.user_params
+    def gen_kwargs(self, metadata, kwargs=None):
+        """Generate keyword arguments from metadata, added to kwargs or to user_params."""
+        kwargs = self.user_params if kwargs is None else kwargs
 
         # Iterate through metadata and extract key-value pairs
         for item in metadata:
@@ -82,23 +232,117 @@ class Check:
                 kwargs[key] = value
         return kwargs
 
+    @staticmethod
+    def validate_questions(questions_data):
+        """Return the list of errors in check types and metadata of the questions to check."""
+        errors = []
+        for q in questions_data.keys():
+            if not questions_data[q]["Check"] or questions_data[q]["Check Type"] == "":
+                continue
+            try:
+                CheckPlan.parse(questions_data[q]["Check Type"])
+            except ValueError as e:
+                errors.append(f"{q}: {e}")
+            try:
+                Check.convert_metadata(questions_data[q]["metadata"])
+            except (ValueError, SyntaxError) as e:
+                errors.append(f"{q}: invalid metadata ({e})")
+        return errors
+
+    def compile_plans(self):
+        """Compile the check plans of all questions to check, before any checking starts."""
+        errors = self.validate_questions(self.questions_data)
+        if errors:
+            raise ValueError("Invalid questions config:\n" + "\n".join(errors))
+        plans = {}
+        # Metadata accumulates from question to question as it always did, but in a
+        # copy, so a caller's user_params give the same plans to every Check built
+        kwargs = dict(self.user_params)
+        for q in self.questions_data.keys():
+            if self._should_evaluate_question(q):
+                metadata = self.convert_metadata(self.questions_data[q]["metadata"])
+                # CheckPlan.compile snapshots the accumulated kwargs per question
+                plans[q] = CheckPlan.compile(
+                    self.questions_data[q]["Check Type"],
+                    self.questions_data[q]["Answer"],
+                    self.gen_kwargs(metadata, kwargs),
+                )
+        return plans
+
     def gen_multiindex(self):
         new_col = pd.MultiIndex.from_product(
             [[self.user_params["name"]], self.result.columns]
         )
         self.result.columns = new_col
 
+    @staticmethod
+    def correct_digest(plan):
+        """Hash of the contents of the test and reference files of the plan."""
+        hasher = hashlib.sha256()
+        for path in plan.correct_files():
+            hasher.update(b"\0")
+            hash_path(path, hasher)
+        return hasher.hexdigest()
+
+    def gen_question_keys(self):
+        """Keys of the questions settings, a question is re-checked only if its key changes."""
+        return {
+            q: json.dumps(
+                [
+                    self.questions_data[q]["Questions"],
+                    plan.config,
+                    plan.correct,
+                    self.correct_digest(plan),
+                    {k: v for k, v in plan.kwargs.items() if k not in IGNORED_KWARGS},
+                ],
+                sort_keys=True,
+                default=str,
+            )
+            for q, plan in self.plans.items()
+        }
+
+    def gen_cell_keys(self):
+        """Keys of the (submission, question) cells built from the submission time and answer."""
+        time_col = self.user_params.get("time")
+        if time_col in self.submissions.columns:
+            times = self.submissions[time_col].astype(str) + "\0"
+        else:
+            times = ""
+        return pd.DataFrame(
+            {
+                q: (
+                    times
+                    + self.submissions[self.questions_data[q]["Questions"]].astype(str)
+                ).to_numpy()
+                for q in self.plans
+            },
+            index=pd.Index(self.submissions[self.user_params["id"]]),
+        )
+
+    def reusable_cells(self):
+        """Return the mask of the submissions whose previous result can be reused, per question."""
+        previous = self.previous
+        # Forced downloads and cache invalidation re-check everything
+        if (
+            previous is None
+            or self.user_params.get("invalidate_cache", False)
+            or self.user_params.get("force_download", False)
+            or previous.scores.size == 0
+            or not self.cell_keys.index.is_unique
+            or not previous.cell_keys.index.is_unique
+        ):
+            return {}
+        reusable = {}
+        for q in self.plans:
+            if previous.question_keys.get(q) != self.question_keys[q]:
+                continue
+            previous_keys = previous.cell_keys[q].reindex(self.cell_keys.index)
+            reusable[q] = (previous_keys == self.cell_keys[q]).to_numpy()
+        return reusable
+
     def check_row(self, submission, question_key, filename):
         """Check a submitted answer for a specific question."""
-        metadata = self.convert_metadata(self.questions_data[question_key]["metadata"])
-        kwargs = self.gen_kwargs(metadata)
-        correct_answer = self.questions_data[question_key]["Answer"]
-        check_type = self.questions_data[question_key]["Check Type"]
-        check = CheckOne(
-            submission, correct_answer, check_type, filename=filename, **kwargs
-        )
-        check.run()
-        return (check.result, check.comment)
+        return run_check(submission, self.plans[question_key], filename)
 
     @staticmethod
     def clean_folder_name(name):
@@ -117,92 +361,245 @@ class Check:
 
     def check_submissions(self):
         """Check all submissions for each question and calculate scores."""
-  
-        def process_row(row):
-            nonlocal progress
-            filename = self.clean_folder_name(
-                str(q) + "_" + row[self.user_params["id"]]
-            )
-            progress += step
-            my_bar.progress(
-                progress, text=progress_text + f"\n\n{row[self.user_params['id']]}"
+        id_col = self.user_params["id"]
+        ids = self.submissions[id_col].tolist()
+        names = self.attempt_names()
+        questions = list(self.plans.keys())
+        self.question_keys = self.gen_question_keys()
+        self.cell_keys = self.gen_cell_keys()
+        reusable = self.reusable_cells()
+
+        # Scores start as NaN, a cell keeps NaN only if its check gives no result
+        scores = np.full((len(ids), len(questions)), np.nan)
+        integer_scores = np.ones(len(questions), dtype=bool)
+        comments = {}
+
+        def store(q, j, rows, results, cell_comments):
+            results = np.asarray(results)
+            if results.dtype == object:
+                results = np.array([np.nan if r is None else r for r in results])
+            scores[rows, j] = results
+            integer_scores[j] &= results.dtype.kind in "iu"
+            for i, comment in zip(rows, cell_comments):
+                if not (isinstance(comment, str) and comment == ""):
+                    comments[q, i] = comment
+
+        if reusable:
+            previous_rows = self.previous.ids.get_indexer(self.cell_keys.index)
+
+        # Build the (question, submission) grid of the cells that changed since the previous check.
+        # Text and numeric chains are checked column-wise and never reach the grid.
+        tasks = []
+        cells = []
+        for j, (q, plan) in enumerate(self.plans.items()):
+            answers = self.submissions[self.questions_data[q]["Questions"]]
+            mask = reusable.get(q, np.zeros(len(ids), dtype=bool))
+            if mask.any():
+                rows = np.flatnonzero(mask)
+                previous_j = self.previous.questions.index(q)
+                scores[rows, j] = self.previous.scores[previous_rows[rows], previous_j]
+                integer_scores[j] &= self.previous.integer_scores[previous_j]
+                for i, previous_i in zip(rows, previous_rows[rows]):
+                    if (q, previous_i) in self.previous.comments:
+                        comments[q, i] = self.previous.comments[q, previous_i]
+                    if (q, names[i]) in self.previous.test_reports:
+                        self.test_reports[q, names[i]] = self.previous.test_reports[
+                            q, names[i]
+                        ]
+            rows = np.flatnonzero(~mask)
+            self.checked_cells += len(rows)
+            if plan.batch:
+                if len(rows) > 0:
+                    check = BatchCheck(
+                        answers.iloc[rows], plan.correct, plan, **plan.kwargs
+                    )
+                    check.run()
+                    store(q, j, rows, check.result, check.comment)
+                continue
+            for i in rows:
+                filename = self.clean_folder_name(str(q) + "_" + names[i])
+                tasks.append((answers.iloc[i], plan, filename))
+                cells.append((q, i))
+
+        prefetched = self.prefetch_submissions(tasks)
+        self.install_dependencies(tasks)
+        # Downloaded files are fresh now, their checks must not download them once more
+        tasks = [(*task, fresh) for task, fresh in zip(tasks, prefetched)]
+        self.prepare_result_cache()
+        my_bar = self.reporter.progress("Checking...")
+
+        def on_done(i, done_count):
+            q, row = cells[i]
+            my_bar.update(
+                done_count / len(tasks), text=f"Checking {q}...\n\n{ids[row]}"
             )
-            result, comment = self.check_row(row[question_str], q, filename)
-            return pd.Series([result, comment], index=[q, f"{q}_comment"])
 
-        step = 1 / self.submissions.shape[0]
-        progress = 0
-        for q in self.questions_data.keys():
-            progress_text = f"Checking {q}..."
-            my_bar = st.progress(progress, text=progress_text)
-            if (
-                self.questions_data[q]["Check"]
-                and self.questions_data[q]["Check Type"] != ""
-            ):
-                question_str = self.questions_data[q]["Questions"]
-                self.result[[q, f"{q}_comment"]] = self.submissions.apply(process_row, axis=1)
-                metadata = self.convert_metadata(self.questions_data[q]["metadata"])
-                kwargs = self.gen_kwargs(metadata)
-                if not kwargs.get("comment", False):
-                    self.result.drop(columns=[f"{q}_comment"], inplace=True)
-                low_v = kwargs.get("normalize_low", 0)
-                high_v = kwargs.get("normalize_high", 100)
-                if kwargs.get("normalize", False):
-                    self.result[q] = MinMaxScaler(
-                        feature_range=(low_v, high_v)
-                    ).fit_transform(self.result[[q]].to_numpy())
-                    self.result[q] = self.result[q].round(
-                        np.max([number_of_dec(i) for i in self.result[q]])
-                    )
-            progress = 0
-            my_bar.empty()
-        self.result.set_index(
-            pd.Index(self.submissions[self.user_params["id"]]), inplace=True
+        results = run_tasks(
+            run_check,
+            tasks,
+            mode=self.user_params.get("executor", "serial") or "serial",
+            workers=self.user_params.get("workers"),
+            on_done=on_done,
         )
+        my_bar.close()
+
+        columns = {q: j for j, q in enumerate(questions)}
+        for (q, i), (result, comment, test_report) in zip(cells, results):
+            store(q, columns[q], [i], [result], [comment])
+            if test_report is not None:
+                self.test_reports[q, names[i]] = test_report
+
+        # Keep the raw scores for the next incremental check, drop the history behind them
+        self.ids = pd.Index(self.submissions[id_col])
+        self.questions = questions
+        self.scores = scores
+        self.integer_scores = integer_scores
+        self.comments = comments
+        self.previous = None
+
+        self.points = scores.copy()
+        self.integer_points = integer_scores.copy()
+        for j, q in enumerate(questions):
+            kwargs = self.plans[q].kwargs
+            if kwargs.get("normalize", False):
+                self.points[:, j] = min_max_scale(
+                    self.points[:, j],
+                    kwargs.get("normalize_low", 0),
+                    kwargs.get("normalize_high", 100),
+                )
+                self.integer_points[j] = False
         self.penalty()
         self.sum_points()
+        self.result = self.build_result()
+        if self.user_params.get("submission_policy") == "best":
+            self.result = self.result.iloc[self.best_attempts()]
         self.gen_multiindex()
 
-    @staticmethod
-    def soft_time(submission_time, deadline_time, **kwargs):
-        """Calculate a soft time penalty for late submissions."""
-        if submission_time < deadline_time:
-            return 1
-        else:
-            delta = (submission_time.timestamp() - deadline_time.timestamp()) / 60
-            if delta < kwargs.get("duration", 30):
-                pen = kwargs.get("start_val", 1) / np.exp(
-                    kwargs.get("power", 0.01) * delta
-                )
-                return np.round(pen, number_of_dec(pen))
-            else:
-                return 0
-
-    @staticmethod
-    def no_penalty(submission_time, deadline_time, **kwargs):
-        """Calculate no penalty for submissions."""
-        return 1
+    def attempt_names(self):
+        """Names of the submissions in file names, later attempts of a student get their number."""
+        ids = self.submissions[self.user_params["id"]].astype(str)
+        attempts = ids.groupby(ids, sort=False).cumcount().to_numpy()
+        return [
+            name if attempt == 0 else f"{name}_{attempt + 1}"
+            for name, attempt in zip(ids, attempts)
+        ]
 
-    @staticmethod
-    def const_penalty(submission_time, deadline_time, **kwargs):
-        if submission_time < deadline_time:
-            return 1
+    def best_attempts(self):
+        """Rows of the best scoring attempt of every student, the latest one of equal totals."""
+        time_col = self.user_params.get("time")
+        keys = pd.DataFrame({"id": np.asarray(self.ids), "total": self.total})
+        if time_col in self.submissions.columns:
+            keys["time"] = pd.to_datetime(self.submissions[time_col]).to_numpy()
         else:
-            return kwargs.get("start_val", 1)
+            keys["time"] = 0
+        keys = keys.sort_values(["total", "time"], kind="stable")
+        return np.sort(keys.drop_duplicates("id", keep="last").index)
+
+    def build_result(self):
+        """Convert the score matrix and the comments to the result DataFrame, once at the end."""
+        columns = {}
+        for j, q in enumerate(self.questions):
+            column = self.points[:, j]
+            if self.integer_points[j] and np.all(np.mod(column, 1) == 0):
+                column = column.astype(np.int64)
+            columns[q] = column
+            if self.plans[q].kwargs.get("comment", False):
+                columns[f"{q}_comment"] = [
+                    self.comments.get((q, i), "") for i in range(len(self.ids))
+                ]
+        columns["penalty_coefficient"] = self.penalty_coefficients
+        columns["total"] = self.total
+        return pd.DataFrame(columns, index=self.ids)
+
+    def prefetch_submissions(self, tasks):
+        """
+        Download all linked submission files of the (answer, plan, filename) tasks before checking.
 
-    @staticmethod
-    def exact_time(submission_time, deadline_time, **kwargs):
-        """Calculate an exact time penalty for submissions."""
-        return int(submission_time < deadline_time)
+        Returns:
+            list: Whether the file of every task was downloaded.
+        """
+        jobs = []
+        job_tasks = []
+        downloader = None
+        for k, (answer, plan, filename) in enumerate(tasks):
+            ext = download_extension(plan)
+            if ext is None or not is_url(answer):
+                continue
+            folder = plan.kwargs.get("submission_folder", "submissions")
+            filepath = f"{folder}/{filename}.{ext}"
+            if not os.path.exists(filepath) or plan.kwargs.get("force_download", False):
+                jobs.append((answer, filepath))
+                job_tasks.append(k)
+                downloader = get_downloader(plan.kwargs)
+        errors = {}
+        if jobs:
+            my_bar = self.reporter.progress("Downloading submissions...")
+            errors = downloader.download_all(
+                jobs,
+                on_done=lambda i, done_count: my_bar.update(
+                    done_count / len(jobs),
+                    text=f"Downloading submissions...\n\n{jobs[i][1]}",
+                ),
+            )
+            my_bar.close()
+            for filepath, error in errors.items():
+                print(f"Unable to download {filepath}: {error}")
+        prefetched = [False] * len(tasks)
+        for k, (_, filepath) in zip(job_tasks, jobs):
+            prefetched[k] = filepath not in errors
+        return prefetched
+
+    def install_dependencies(self, tasks):
+        """
+        Install the modules imported by code/project submissions and tests that are missing,
+        with one install per interpreter before checking.
+        """
+        sources = {}
+        for answer, plan, filename in tasks:
+            methods = {method_name for method_name, _ in plan.steps}
+            kwargs = plan.kwargs
+            if not methods & {"code", "project"} or not kwargs.get(
+                "install_missing", True
+            ):
+                continue
+            environment = (
+                kwargs.get("runner_python") or sys.executable,
+                kwargs.get("wheel_cache"),
+            )
+            paths = sources.setdefault(environment, set())
+            if "project" in methods:
+                paths.add(plan.correct)
+            else:
+                paths.add(f"{plan.correct}.py")
+            # Imports of code submissions reach the tests only with import_libs
+            if "project" in methods or kwargs.get("import_libs", False):
+                if is_url(answer):
+                    folder = kwargs.get("submission_folder", "submissions")
+                    paths.add(f"{folder}/{filename}.{download_extension(plan)}")
+                elif isinstance(answer, str):
+                    paths.add(answer)
+        for (python, wheel_cache), paths in sources.items():
+            paths = sorted(path for path in paths if os.path.exists(path))
+            with self.reporter.status("Installing missing modules..."):
+                failed = install_missing(paths, python, wheel_cache)
+            if failed:
+                print(f"Unable to install modules: {', '.join(failed)}")
+
+    def prepare_result_cache(self):
+        """Evict stale results of code/project/data checks, or drop all of them if asked to."""
+        if not self.user_params.get("result_cache", True):
+            return
+        cache = ResultCache(
+            self.user_params.get("submission_folder", "submissions"),
+            max_age_days=self.user_params.get("result_cache_max_age_days", 30),
+            max_entries=self.user_params.get("result_cache_max_entries", 100000),
+        )
+        if self.user_params.get("invalidate_cache", False):
+            cache.clear()
+        cache.evict()
 
     def penalty(self):
         """Apply penalties to submissions based on user-defined parameters."""
-        mapping_methods = {
-            "soft": self.soft_time,
-            "exact": self.exact_time,
-            "none": self.no_penalty,
-            "const": self.const_penalty,
-        }
         date_format = "%Y-%m-%d %H:%M:%S"
         penalty_params = {
             list(k.keys())[0]: list(k.values())[0]
@@ -212,55 +609,46 @@ class Check:
             penalty_params.get("deadline_time", "2050-01-01 00:00:00"),
             format=date_format,
         )
-        method = mapping_methods[penalty_params.get("penalty_formula", "exact")]
         if (
             "time" in self.user_params
             and self.user_params["time"] in self.submissions.columns
         ):
             # Use the specified time column to calculate penalty_coefficient
-            self.submissions["penalty_coefficient"] = self.submissions[
-                self.user_params["time"]
-            ].apply(lambda x: method(x, **penalty_params))
+            submission_times = pd.to_datetime(
+                self.submissions[self.user_params["time"]]
+            )
         else:
-            # If 'time' column is missing, apply method with a default value (e.g., current time or a constant)
-            self.submissions["penalty_coefficient"] = self.submissions.apply(
-                lambda row: method(datetime.now(), **penalty_params), axis=1
+            # If 'time' column is missing, every submission is made now
+            submission_times = np.full(
+                len(self.submissions), np.datetime64(datetime.now(), "ns")
             )
-        self.result = self.result.merge(
-            self.submissions[[self.user_params["id"], "penalty_coefficient"]],
-            on=self.user_params["id"],
-            how="left",
-        ).set_index(self.user_params["id"])
-        self.submissions.drop("penalty_coefficient", axis=1, inplace=True)
+        # Rows of the score matrix are the submissions in the same order
+        self.penalty_coefficients = penalty_coefficients(
+            submission_times, **penalty_params
+        )
 
     def sum_points(self):
         """Calculate the total score for each submission based on question weights and penalties."""
-        eval_formulas = self.user_params.get("eval_formula", [])
-        for eval_formula in eval_formulas:
-            for q, rules in eval_formula.items():
-                if self._should_evaluate_question(q):
-                    points_q = self.result[q]
-
-                    rule_cond = rules[0]
-                    rule_actions = rules[1:]
-                    # print(q, rule_cond, rule_actions)
-                    condition_actions = {
-                        "pass": self._process_pass_condition,
-                        "fail": self._process_fail_condition,
-                        # Add more conditions as needed
-                    }
-
-                    # Check if the condition is in the dictionary and call the corresponding function
-                    condition_type = rule_cond.split("_")[0]
-                    if (
-                        condition_type in condition_actions
-                        and rule_cond.split("_")[1].isdigit()
-                    ):
-                        condition_actions[condition_type](
-                            points_q, float(rule_cond.split("_")[1]), rule_actions, q
-                        )
-
-        self._calculate_total_score()
+        questions = [
+            q for q in self.questions_data if self._should_evaluate_question(q)
+        ]
+        weights = np.array(
+            [self.questions_data[q]["Weight"] for q in questions], dtype=np.float64
+        )
+        columns = [self.questions.index(q) for q in questions]
+        scores = self.points[:, columns]
+        weighted, total = apply_rules(scores, questions, weights, self.rules)
+        targets = rule_targets(self.rules, questions)
+        self.points[:, columns] = weighted
+        for j, q in zip(columns, questions):
+            # Integer scores with integer weights and no rules stay integer
+            if q in targets or not isinstance(
+                self.questions_data[q]["Weight"], (int, np.integer)
+            ):
+                self.integer_points[j] = False
+        self.total = np.int_(
+            np.round(total * (self.penalty_coefficients / weights.sum()))
+        )
 
     def _should_evaluate_question(self, q):
         """Check if the question should be evaluated."""
@@ -270,138 +658,25 @@ class Check:
             and self.questions_data[q]["Check Type"] != ""
         )
 
-    def _apply_rule_actions(self, condition_mask, rule_actions, q):
-        """Apply actions based on the rule condition."""
-        for rule_action_ in rule_actions:
-            rule_action = rule_action_.split("_")
-            questions_for_process = []
-            if rule_action[0] == "all":
-                questions_for_process = [i for i in self.questions_data.keys()]
-            else:
-                if rule_action[0].startswith("q"):
-                    questions_for_process = [rule_action[0]]
-            # Call the corresponding method based on the rule[1] value
-            rule_action_type = rule_action[1] if len(rule_action) > 1 else None
-            rule_actions_mapping = {
-                "reweight": self._multiply_all_other_questions,
-                "set": self._set_value_for_other_questions,
-                # Add more rule[1] values and corresponding methods as needed
-            }
-
-            if rule_action_type in rule_actions_mapping:
-                rule_actions_mapping[rule_action_type](
-                    condition_mask, rule_action, q, questions_for_process
-                )
-
-    def _process_pass_condition(self, points_q, threshold, rule_actions, q):
-        """Process 'pass' condition and perform corresponding action."""
-        condition_mask = points_q >= threshold
-        self._apply_rule_actions(condition_mask, rule_actions, q)
-
-    def _process_fail_condition(self, points_q, threshold, rule_actions, q):
-        """Process 'fail' condition and perform corresponding action."""
-        condition_mask = points_q < threshold
-        self._apply_rule_actions(condition_mask, rule_actions, q)
-
-    def _multiply_all_other_questions(self, condition_mask, rule_action, q, qs_proc):
-        """Multiply all other questions based on the rule action."""
-        for other_q in qs_proc:
-            if other_q != q and self._should_evaluate_question(other_q):
-                tmp_column = f"{other_q}_tmp_multiply"
-                self.result[tmp_column] = 1.0
-                multiplier = (
-                    float(rule_action[2])
-                    if any(
-                        [
-                            rule_action[2].isdigit(),
-                            rule_action[2][1:].isdigit()
-                            and rule_action[2].startswith("-"),
-                        ]
-                    )
-                    else 1.0
-                )
-                self.result[tmp_column] *= np.where(condition_mask, multiplier, 1.0)
-
-    def _set_value_for_other_questions(self, condition_mask, rule_action, q, qs_proc):
-        """Set a value for other questions based on the rule action."""
-        for other_q in qs_proc:
-            if other_q != q and self._should_evaluate_question(other_q):
-                tmp_column = f"{other_q}_tmp_set"
-                value_to_set = float(rule_action[2]) if isnumeric(rule_action[2]) else 0
-                self.result[tmp_column] = np.where(
-                    condition_mask, value_to_set, self.result[other_q]
-                )
-
-    def _calculate_total_score(self):
-        """Calculate the total score and apply penalties."""
-        self._initialize_result_columns()
-
-        for q in self.questions_data.keys():
-            if self._should_evaluate_question(q):
-                self._apply_question_weights_and_max_values(q)
-
-        self._finish_calculating_total_score()
-
-    def _initialize_result_columns(self):
-        """Initialize necessary result columns."""
-        self.result["total"] = [0 for i in range(len(self.result))]
-        self.result["max_val"] = [0 for i in range(len(self.result))]
-
-    def _apply_question_weights_and_max_values(self, q):
-        """Apply question weights and max values to the result."""
-        self.result[q] *= self.questions_data[q]["Weight"]
-        self.result["max_val"] += self.questions_data[q]["Weight"]
-
-        tmp_column_name_pattern = re.compile(rf"{q}_tmp_(\w+)")
-        matching_columns = [
-            col for col in self.result.columns if tmp_column_name_pattern.match(col)
-        ]
-
-        for matching_column in matching_columns:
-            # Extract the operation name from the column using regular expression
-            operation_match = tmp_column_name_pattern.match(matching_column)
-            if operation_match:
-                operation_name = operation_match.group(1)
-
-                # Choose the operation based on the extracted operation name
-                operation_mapping = {
-                    "multiply": self._multiply_temporary_column_back,
-                    "set": self._set_value_temporary_column_back,
-                    # Add more operations as needed
-                }
-
-                if operation_name in operation_mapping:
-                    operation_mapping[operation_name](q)
-        self.result["total"] += self.result[q]
-
-    def _multiply_temporary_column_back(self, q):
-        """Multiply the temporary column back to the result DataFrame."""
-        tmp_column_name = f"{q}_tmp_multiply"
-        self.result[q] *= self.result[tmp_column_name]
-        self.result.drop(tmp_column_name, axis=1, inplace=True)
-
-    def _set_value_temporary_column_back(self, q):
-        """Set a value for the temporary column back to the result DataFrame."""
-        tmp_column_name = f"{q}_tmp_set"
-        self.result[q] = self.result[
-            tmp_column_name
-        ]  # Assuming all values are the same
-        self.result.drop(tmp_column_name, axis=1, inplace=True)
-
-    def _finish_calculating_total_score(self):
-        """Finish calculating the total score and round it."""
-        self.result["total"] *= (
-            self.result["penalty_coefficient"] / self.result["max_val"]
-        )
-        self.result["total"] = np.int_(np.round(self.result["total"]))
-        self.result.drop("max_val", axis=1, inplace=True)
-
 
 class CheckOne:
     """
     Class for performing a sequence of operations on an answer and a correct value.
     """
 
+    methods = (
+        "soft",
+        "hard",
+        "threshlow",
+        "threshhigh",
+        "normalize",
+        "reweight",
+        "num",
+        "code",
+        "project",
+        "data",
+    )
+
     def __init__(self, answer, correct, config, **kwargs):
         """
         Initialize the CheckOne object with answer, correct value, configuration, and optional keyword arguments.
@@ -413,14 +688,19 @@ class CheckOne:
         self.correct = correct
         self.result = 0
         self.comment = kwargs.get("comment", "")
+        # Status and duration of every test run by code/project checks
+        self.test_report = None
+        # Set when the tests were stopped by the timeout or a resource limit
+        self.limit_exceeded = False
         self.config = config
         self.build_chain()
 
     def soft(self):
         """
-        Apply a soft comparison operation using fuzz.WRatio.
+        Apply a soft comparison operation using WRatio of the fuzzy backend.
         """
-        self.result = fuzz.WRatio(self.correct.lower(), str(self.answer).lower())
+        backend = self.kwargs.get("fuzzy_backend", DEFAULT_FUZZY_BACKEND)
+        self.result = int(wratio(self.correct, [str(self.answer)], backend)[0])
         return self
 
     def hard(self):
@@ -474,10 +754,15 @@ class CheckOne:
         """
         Perform code-related operations.
         """
+        self.answer = self.__download()
+        key = self.__cache_key("code", self.answer, f"{self.correct}.py")
+        if self.__load_cached(key):
+            return self
         tests_run, tests_passed = self.__parse_test_output()
         if tests_run > 0:
             self.result = tests_passed / tests_run * 100
             self.result = np.round(self.result, number_of_dec(self.result))
+        self.__store_cached(key)
         return self
 
     def project(self):
@@ -485,72 +770,93 @@ class CheckOne:
         Perform project-related operations.
         """
         self.answer = self.__download()
+        # The test file is copied into the submitted project, keep it out of the key
+        key = self.__cache_key(
+            "project",
+            self.answer,
+            self.correct,
+            exclude=(os.path.basename(self.correct),),
+        )
+        if self.__load_cached(key):
+            return self
         self.__copy_correct_file(self.answer)
         tests_run, tests_passed = self.__parse_test_output(extract_code=False)
         if tests_run > 0:
             self.result = tests_passed / tests_run * 100
             self.result = np.round(self.result, number_of_dec(self.result))
+        self.__store_cached(key)
         return self
 
     def data(self):
-        correct_df, answer_df = self.__read_file()
+        self.answer = self.__download(self.kwargs.get("extension", "csv"))
+        key = self.__cache_key("data", self.answer, self.correct)
+        if self.__load_cached(key):
+            return self
+        correct_df = read_reference(self.correct)
         columns_check = self.kwargs.get("columns", list(correct_df.columns))
         error_funcs = self.kwargs.get(
             "error_funcs", ["neg_mean_squared_error" for i in correct_df.columns]
         )
-        errors = []
-        for c, e in zip(columns_check, error_funcs):
+        answer_columns = self.__match_columns(columns_check, list(correct_df.columns))
+        # Only the checked columns of the submission are loaded
+        answer_df = read_table(
+            self.answer,
+            list(dict.fromkeys(c for c in answer_columns if c is not None)),
+        )
+        # Columns with the same metric and length are scored in one 2-D operation
+        groups = {}
+        for i, (c, e, answer_column) in enumerate(
+            zip(columns_check, error_funcs, answer_columns)
+        ):
             correct_column = correct_df[c]
+            if answer_column is not None:
+                column_check = answer_df[answer_column]
+            else:
+                print("use zeros list")
+                column_check = [0 for i in correct_df[c]]
+            adjust_len = np.min([len(correct_column), len(column_check)])
+            group = groups.setdefault((e, adjust_len), ([], [], []))
+            group[0].append(i)
+            group[1].append(column_check[:adjust_len])
+            group[2].append(correct_column[:adjust_len])
+        scores = {}
+        for (e, _), (indices, answer_columns_, correct_columns) in groups.items():
             try:
-                column_check = answer_df[c]
-            except Exception:
-                try:
-                    column_check = answer_df[c.lower()]
-                except Exception:
-                    try:
-                        print(self.kwargs.get("filename"), "use first column")
-                        column_check = answer_df[answer_df.columns[0]]
-                    except Exception:
-                        print("use zeros list")
-                        column_check = [0 for i in correct_df[c]]
-            try:
-                scorer = sklearn.metrics.get_scorer(e)
-                adjust_len = np.min([len(correct_column), len(column_check)])
-                error = scorer(
-                    IdentityTransformer(),
-                    correct_column[:adjust_len],
-                    column_check[:adjust_len],
+                scores.update(
+                    zip(
+                        indices,
+                        get_metric(e).score_columns(answer_columns_, correct_columns),
+                    )
                 )
-                errors.append(np.round(error, number_of_dec(error)))
+            except Exception as e_:
+                scores.update((i, e_) for i in indices)
+        # Columns that could not be scored stay NaN and are skipped by the reducers
+        errors = np.full(len(scores), np.nan)
+        for i, score in scores.items():
+            try:
+                if isinstance(score, Exception):
+                    raise score
+                errors[i] = np.round(score, number_of_dec(score))
             except Exception as e_:
                 print(e_)
-        sum_points_method = self.kwargs.get("sum_points_method", "mean")
-        try:
-            self.result = eval(f"np.{sum_points_method}(errors)")
-        except Exception:
-            self.result = eval(f"np.mean(errors)")
+        reducer = get_reducer(self.kwargs.get("sum_points_method", "mean"))
+        self.result = reducer(
+            errors,
+            weights=self.kwargs.get("column_weights"),
+            trim=self.kwargs.get("trim", 0.1),
+        )
+        self.__store_cached(key)
         return self
 
     def build_chain(self):
         """
-        Parse the configuration string and build the list of operations.
+        Bind the steps of the check plan (parsed from the configuration string if needed).
         """
-        methods = self.config.split("_")
-        self.method_list = []
-        i = 0
-        while i < len(methods):
-            method_name = methods[i]
-            method = getattr(self, method_name)
-            if callable(method):
-                param_index = i + 1
-                param_list = []
-                while param_index < len(methods) and isnumeric(methods[param_index]):
-                    param_list.append(int(methods[param_index]))
-                    param_index += 1
-                self.method_list.append({"method": method, "params": param_list})
-                i = param_index
-            else:
-                raise ValueError(f"Unknown method: {method_name}")
+        plan = CheckPlan.compile(self.config)
+        self.method_list = [
+            {"method": getattr(self, method_name), "params": params}
+            for method_name, params in plan.steps
+        ]
 
     def run(self):
         """
@@ -561,12 +867,61 @@ class CheckOne:
             params = method_dict["params"]
             method(*params)
 
-    def __read_file(self):
-        extension = self.kwargs.get("extension", "csv")
-        self.answer = self.__download(extension)
-        correct_df = pd.read_csv(self.correct)
-        answer_df = pd.read_csv(self.answer)
-        return correct_df, answer_df
+    def __cache_key(self, method_name, *paths, exclude=()):
+        """
+        Build the result cache key from the submission and correct files, None if the cache is disabled.
+        """
+        if not self.kwargs.get("result_cache", True):
+            return None
+        return make_key(method_name, paths, self.kwargs, exclude)
+
+    def __load_cached(self, key):
+        """
+        Take the result and the comment from the result cache, return whether they were found.
+        """
+        if key is None:
+            return False
+        folder = self.kwargs.get("submission_folder", "submissions")
+        cached = ResultCache(folder).get(key)
+        if cached is None:
+            return False
+        self.result, self.comment = cached
+        return True
+
+    def __store_cached(self, key):
+        """
+        Store the result and the comment in the result cache.
+        """
+        # Timeouts depend on the load of the machine, so such runs are repeated next time
+        if key is not None and not self.limit_exceeded:
+            folder = self.kwargs.get("submission_folder", "submissions")
+            ResultCache(folder).put(key, self.result, self.comment)
+
+    def __match_columns(self, columns_check, correct_columns):
+        """
+        Find the submitted column for every checked column, None if there is none.
+        """
+        available = table_columns(self.answer)
+        positional = table_format(self.answer) == "npy"
+        matched = []
+        for c in columns_check:
+            if c in available:
+                matched.append(c)
+            elif isinstance(c, str) and c.lower() in available:
+                matched.append(c.lower())
+            elif (
+                positional
+                and c in correct_columns
+                and str(correct_columns.index(c)) in available
+            ):
+                # Columns of NumPy arrays follow the order of the reference columns
+                matched.append(str(correct_columns.index(c)))
+            elif available:
+                print(self.kwargs.get("filename"), "use first column")
+                matched.append(available[0])
+            else:
+                matched.append(None)
+        return matched
 
     def __copy_correct_file(self, path):
         shutil.copy2(self.correct, path)
@@ -576,22 +931,11 @@ class CheckOne:
         """
         Download a Python file from Yandex Disk.
         """
-        # Initialize Yandex Disk client
-        token = self.kwargs.get("yatoken", "")
-        y = YaDisk(token=token)
 
         # Extract submission filename from URL
         def randomword(length):
             letters = string.ascii_lowercase
             return "".join(random.choice(letters) for i in range(length))
-        
-        def convert_to_old_format(answer):
-            # Use regex to find the substring starting with `?idApp=` and ending with the last `%2F`
-            converted_path = re.sub(r"\?idApp=.*%2F", "/", answer)
-            # Replace any remaining `%2F` with `/` to finalize the format
-            converted_path = converted_path.replace("%2F", "/")
-            # Extract the final path part if `https://disk.yandex.ru/client/disk/` is present
-            return converted_path
 
         basename = (
             os.path.basename(self.answer)
@@ -600,22 +944,15 @@ class CheckOne:
         )
         filename = self.kwargs.get("filename", basename)
         folder = self.kwargs.get("submission_folder", "submissions")
-        if not os.path.exists(folder):
-            os.makedirs(folder)
+        os.makedirs(folder, exist_ok=True)
         filepath = f"{folder}/{filename}.{ext}"
-        # Download submission file from Yandex Disk
-        if validators.url(self.answer):
-            if not os.path.exists(filepath) or self.kwargs.get("force_download", False):
-                if "idApp=" in self.answer and "idDialog=" in self.answer:
-                    # Extract the necessary part of the link for new format
-                    file_id = convert_to_old_format(self.answer).split("https://disk.yandex.ru/client/disk/")[-1]
-                else:
-                    # Extract the necessary part of the link for old format
-                    file_id = self.answer.split("https://disk.yandex.ru/client/disk/")[-1]
-                y.download(
-                    file_id,
-                    filepath,
-                )
+        # Download submission file from Yandex Disk (usually already done by the prefetch stage)
+        if is_url(self.answer):
+            if not os.path.exists(filepath) or (
+                self.kwargs.get("force_download", False)
+                and not self.kwargs.get("prefetched", False)
+            ):
+                get_downloader(self.kwargs).download(self.answer, filepath)
         elif os.path.isfile(self.answer):
             # Copy local file to the target folder if it's a valid file path
             if not os.path.exists(filepath) or self.kwargs.get("force_download", False):
@@ -680,30 +1017,15 @@ class CheckOne:
                 allowed * disallowed
             )  # If not explicitly allowed, it's disallowed
 
-        self.answer = self.__download()
-        # Parse the code into an AST
-        try:
-            with open(self.answer, "r", encoding="utf-8") as answer:
-                answer_code = answer.read()
-            parsed_code = ast.parse(answer_code)
-        except Exception as e:
-            print(e)
+        # The import table is built when the file is parsed
+        source = load_source(self.answer)
+        if source.error is not None:
+            print(source.error)
             return []
-
-        # Find and extract imports
-        extracted_modules = []
-        for node in ast.walk(parsed_code):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    extracted_modules.append(
-                        PackageName(alias_name=alias.name, alias_as_name=alias.asname)
-                    )
-            elif isinstance(node, ast.ImportFrom):
-                module = node.module
-                for alias in node.names:
-                    extracted_modules.append(
-                        PackageName(module, alias.name, alias.asname)
-                    )
+        extracted_modules = [
+            PackageName(module, name, asname)
+            for module, name, asname, _ in source.imports
+        ]
         all_extracted_imports = {
             k.get_as_string(): gen_import_line(k) for k in extracted_modules
         }
@@ -719,40 +1041,29 @@ class CheckOne:
         """
         extracted_imports = self.__extract_imports()
 
-        try:
-            # Read the content of the downloaded Python file
-            with open(self.answer, "r", encoding="utf-8") as answer:
-                answer_code = answer.read()
-            # Parse the code into an AST
-            parsed_code = ast.parse(answer_code)
-        except Exception as e:
-            print(e)
-            with open(f"{self.correct}.py", "r", encoding="utf-8") as my_file:
-                my_content = my_file.read()
-            test_file = self.answer.split(".")[0] + "_test" + ".py"
+        # Parsed once and shared with the import extraction and the dependency pre-pass
+        source = load_source(self.answer)
+        if source.error is not None:
+            print(source.error)
+            my_content = read_template(f"{self.correct}.py")
+            test_file = os.path.splitext(self.answer)[0] + "_test.py"
             # Save the modified content as new_my.py
             with open(f"{test_file}", "w", encoding="utf-8") as new_my_file:
                 new_my_file.write(my_content)
             return test_file
 
-        ast_objects_ = {"function": ast.FunctionDef, "class": ast.ClassDef}
         code_names_to_extract = self.kwargs.get("code_names", ["foo"])
         code_types = self.kwargs.get("code_types", ["function"])
 
         # Find and extract the specified function or class definition
         extracted_code = ""
         for code_name_to_extract, code_type in zip(code_names_to_extract, code_types):
-            for node in ast.walk(parsed_code):
-                if (
-                    isinstance(node, ast_objects_[code_type])
-                    and node.name == code_name_to_extract
-                ):
-                    extracted_code += ast.unparse(node)
-                    extracted_code += "\n\n"
-                    break
+            definition = source.extract(code_name_to_extract, code_type)
+            if definition is not None:
+                extracted_code += definition
+                extracted_code += "\n\n"
 
-        with open(f"{self.correct}.py", "r", encoding="utf-8") as my_file:
-            my_content = my_file.read()
+        my_content = read_template(f"{self.correct}.py")
 
         # Insert the extracted function or class at the beginning of my.py
         import_libs = self.kwargs.get("import_libs", False)
@@ -760,7 +1071,7 @@ class CheckOne:
             "\n".join(extracted_imports) + "\n\n" if import_libs else ""
         )
         modified_content = extracted_imports_str + extracted_code + "\n\n" + my_content
-        test_file = self.answer.split(".")[0] + "_test" + ".py"
+        test_file = os.path.splitext(self.answer)[0] + "_test.py"
         # Save the modified content as new_my.py
         with open(f"{test_file}", "w", encoding="utf-8") as new_my_file:
             new_my_file.write(modified_content)
@@ -768,38 +1079,37 @@ class CheckOne:
         # print(f"'{code_names_to_extract}' has been inserted at the beginning of {test_file}.")
         return test_file
 
-    @staticmethod
-    def __run_tests(test_file_path):
+    def __run_tests(self, test_file_path):
         """
         Run tests by executing the specified test file from its directory.
         """
-        # Save the current directory
-        original_dir = os.getcwd()
-        try:
-            # Change to the directory of the test file
-            test_dir = os.path.join(original_dir, os.path.dirname(test_file_path))
-            os.chdir(test_dir)
-
-            # Run the test file
-            result = subprocess.run(
-                [sys.executable, os.path.basename(test_file_path)],
-                capture_output=True,
-                encoding="utf-8",
-            )
-            return result
-        finally:
-            # Return to the original directory
-            os.chdir(original_dir)
+        # Run from the directory of the test file, without os.chdir so that checks can run in threads
+        test_dir = os.path.join(os.getcwd(), os.path.dirname(test_file_path))
+        timeout = float(self.kwargs["timeout"]) if self.kwargs.get("timeout") else None
+        limits = {
+            "max_memory_mb": self.kwargs.get("max_memory_mb"),
+            "max_cpu_seconds": self.kwargs.get("max_cpu_seconds"),
+        }
+        python = self.kwargs.get("runner_python") or sys.executable
+        if self.kwargs.get("warm_runner", True) and warm_runner_available():
+            preload = self.kwargs.get("preload_modules", DEFAULT_PRELOAD)
+            pool = get_pool(self.kwargs.get("runner_workers"), tuple(preload), python)
+            try:
+                return pool.run(test_file_path, test_dir, timeout, limits)
+            except (OSError, RuntimeError) as e:
+                print(f"Warm runner failed, running tests in a new interpreter: {e}")
+        return run_test_subprocess(test_file_path, test_dir, timeout, python, limits)
 
-    @staticmethod
-    def __install_package(package):
+    def __install_package(self, package):
         """
-        Install a Python package using pip.
+        Install a Python package using pip, return whether it is installed.
         """
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-        except Exception as e:
-            print(e)
+        # Usually done by the pre-pass of Check, a failed install is never repeated
+        return install_modules(
+            [package.split(".")[0]],
+            self.kwargs.get("runner_python") or sys.executable,
+            self.kwargs.get("wheel_cache"),
+        )
 
     def __safety_run_tests(self, extract_code=True):
         """
@@ -808,7 +1118,7 @@ class CheckOne:
         test_file = self.__extract_code() if extract_code else self.correct
         self.missing_module = None
         attempts = self.kwargs.get("import_attempts", 3)
-        test_output = ""
+        result = TestRun(returncode=0)
         while True:
             if attempts == 0:
                 break
@@ -824,20 +1134,48 @@ class CheckOne:
                 ):
                     attempts -= 1
                 self.missing_module = error_message.group(1)
-                self.__install_package(self.missing_module)
+                if not self.__install_package(self.missing_module):
+                    break
             else:
                 break
-        return test_output
+        return result
 
     def __parse_test_output(self, extract_code=True):
         """
-        Parse the output of the test run and extract the number of tests run, passed, and failed.
+        Run the tests and count the tests run and passed.
+
+        The counts come from the per-test records of the runner, the printed unittest
+        summary is parsed only when there are no records (e.g. a custom test runner).
         """
-        test_output = self.__safety_run_tests(extract_code)
+        result = self.__safety_run_tests(extract_code)
+        test_output = str(result.stdout) + str(result.stderr)
         if isinstance(self.kwargs.get("comment", False), str):
             self.comment = self.kwargs.get("comment")
         elif self.kwargs.get("comment", False):
             self.comment = f"Test output: {test_output}"
+        # A run stopped by a limit fails as a whole, whatever tests passed before
+        if result.timed_out:
+            self.limit_exceeded = True
+            self.comment = f"Tests timed out after {self.kwargs.get('timeout')} s"
+            return 0, 0
+        if result.returncode < 0:
+            self.limit_exceeded = True
+            signal_number = -result.returncode
+            reason = signal.Signals(signal_number).name
+            if signal_number == getattr(signal, "SIGXCPU", None):
+                reason += f", CPU time limit of {self.kwargs.get('max_cpu_seconds')} s"
+            self.comment = f"Tests were killed ({reason})"
+            return 0, 0
+        # The memory limit is an address space limit, an overrun raises MemoryError
+        if self.kwargs.get("max_memory_mb") and result.memory_error():
+            self.limit_exceeded = True
+            self.comment = (
+                f"Memory limit of {self.kwargs.get('max_memory_mb')} MB exceeded"
+            )
+            return 0, 0
+        if result.tests is not None:
+            self.test_report = result.tests
+            return result.count()
         # Extract number of tests run
         match = re.search(r"Ran (\d+) test", test_output)
         if match:
@@ -861,11 +1199,133 @@ class CheckOne:
         return tests_run, tests_passed
 
 
-class IdentityTransformer(BaseEstimator):
-    def fit(self, X, y=None):
-        # This method does nothing, as we don't need to learn anything from the data
+class BatchCheck:
+    """
+    Vectorized counterpart of CheckOne for chains built only from text and numeric checks.
+
+    Takes the whole column of submitted answers and gives the same results as running
+    CheckOne for every answer.
+    """
+
+    methods = (
+        "soft",
+        "hard",
+        "num",
+        "threshlow",
+        "threshhigh",
+        "normalize",
+        "reweight",
+    )
+
+    def __init__(self, answers, correct, config, **kwargs):
+        """
+        Initialize the BatchCheck object with answers column, correct value, configuration, and optional keyword arguments.
+        """
+        self.kwargs = kwargs
+        self.method_list = []
+        self.answers = pd.Series(answers).reset_index(drop=True)
+        self.correct = correct
+        self.result = np.zeros(len(self.answers), dtype=np.int_)
+        self.comment = [kwargs.get("comment", "")] * len(self.answers)
+        self.config = config
+        self.build_chain()
+
+    def soft(self):
+        """
+        Apply a soft comparison operation using WRatio of the fuzzy backend,
+        every distinct answer is scored once.
+        """
+        backend = self.kwargs.get("fuzzy_backend", DEFAULT_FUZZY_BACKEND)
+        self.result = wratio(self.correct, self.answers, backend)
+        return self
+
+    def hard(self):
+        """
+        Apply a hard comparison operation.
+        """
+        matches = self.answers.str.lower() == self.correct.lower()
+        self.result = matches.to_numpy(dtype=np.int_) * 100
         return self
 
-    def predict(self, X):
-        # This method returns the input values as they are
-        return X
+    def threshlow(self, threshold=50):
+        """
+        Apply a threshold operation for values less than the threshold.
+        """
+        self.result = np.where(
+            self.result < threshold, self.kwargs.get("threshlow_val", 0), self.result
+        )
+        return self
+
+    def threshhigh(self, threshold=50):
+        """
+        Apply a threshold operation for values greater than or equal to the threshold.
+        """
+        self.result = np.where(
+            self.result >= threshold,
+            self.kwargs.get("threshhigh_val", 100),
+            self.result,
+        )
+        return self
+
+    def normalize(self, coef=100):
+        """
+        Normalizes the result by dividing by a coef.
+        """
+        self.result = self.result / coef
+        return self
+
+    def reweight(self, coef=1):
+        """
+        Reweight the result by multiplying on a coef.
+        """
+        self.result = self.result * coef
+        return self
+
+    def num(self, tol=0.02):
+        """
+        Apply assertequal checking of numeric answers with relative tol
+        """
+
+        def to_float(value):
+            try:
+                return float(value)
+            except Exception:
+                return np.nan
+
+        correct = to_float(self.correct)
+        if np.isnan(correct):
+            print("Unable perform num checking")
+            return self
+        # Convert every distinct answer once, float() keeps parity with CheckOne.num
+        codes, uniques = pd.factorize(self.answers)
+        values = np.array([to_float(i) for i in uniques], dtype=float)
+        values = values[codes] if len(uniques) > 0 else np.full(len(codes), np.nan)
+        values[codes == -1] = np.nan
+        valid = ~np.isnan(values)
+        if not valid.all():
+            print("Unable perform num checking")
+        self.result = np.where(
+            valid, np.isclose(values, correct, rtol=tol).astype(np.int_), self.result
+        )
+        return self
+
+    def build_chain(self):
+        """
+        Bind the steps of the check plan (parsed from the configuration string if needed).
+        """
+        plan = CheckPlan.compile(self.config)
+        if not plan.batch:
+            raise ValueError(f"No vectorized version of check type: {plan.config}")
+        self.method_list = [
+            {"method": getattr(self, method_name), "params": params}
+            for method_name, params in plan.steps
+        ]
+
+    def run(self):
+        """
+        Perform the specified operations on the results.
+        """
+        for method_dict in self.method_list:
+            method = method_dict["method"]
+            params = method_dict["params"]
+            method(*params)
@@ -0,0 +1,92 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Table formats by file extension, other extensions are read as CSV
+TABLE_FORMATS = {
+    "csv": "csv",
+    "parquet": "parquet",
+    "pq": "parquet",
+    "feather": "feather",
+    "arrow": "feather",
+    "npy": "npy",
+}
+
+
+def table_format(path):
+    """Return the format of the table file by its extension."""
+    ext = os.path.splitext(str(path))[1].lstrip(".").lower()
+    return TABLE_FORMATS.get(ext, "csv")
+
+
+def _npy_frame(array):
+    # Columns of NumPy arrays are named by position, the data stays memory-mapped
+    if array.ndim == 1:
+        array = array.reshape(-1, 1)
+    return pd.DataFrame(
+        array, columns=[str(i) for i in range(array.shape[1])], copy=False
+    )
+
+
+def table_columns(path):
+    """
+    Return the column names of the table file without reading its data.
+    """
+    file_format = table_format(path)
+    if file_format == "csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    if file_format == "parquet":
+        import pyarrow.parquet
+
+        names = pyarrow.parquet.ParquetFile(path).schema_arrow.names
+        return [name for name in names if not name.startswith("__index_level_")]
+    if file_format == "feather":
+        import pyarrow.ipc
+
+        try:
+            with pyarrow.ipc.open_file(path) as reader:
+                names = reader.schema.names
+        except pyarrow.ArrowInvalid:
+            # Feather V1 files have no IPC schema
+            return list(pd.read_feather(path).columns)
+        return [name for name in names if not name.startswith("__index_level_")]
+    return list(_npy_frame(np.load(path, mmap_mode="r")).columns)
+
+
+def read_table(path, columns=None):
+    """
+    Read the table file, only the given columns if any.
+
+    Parameters:
+        path (str): CSV, Parquet, Feather or NPY file.
+        columns (list): Columns to read, all columns if None.
+
+    Returns:
+        DataFrame: The table, NPY files are memory-mapped.
+    """
+    file_format = table_format(path)
+    if file_format == "csv":
+        return pd.read_csv(path, usecols=columns)
+    if file_format == "parquet":
+        return pd.read_parquet(path, columns=columns)
+    if file_format == "feather":
+        return pd.read_feather(path, columns=columns)
+    frame = _npy_frame(np.load(path, mmap_mode="r"))
+    return frame if columns is None else frame[columns]
+
+
+@lru_cache(maxsize=32)
+def _read_reference(path, version):
+    return read_table(path)
+
+
+def read_reference(path):
+    """
+    Return the reference table of a question, read once while the file is unchanged.
+
+    The table is shared by all checks and must not be modified.
+    """
+    stat = os.stat(path)
+    return _read_reference(os.path.abspath(path), (stat.st_mtime_ns, stat.st_size))
@@ -1,28 +1,207 @@
 import yaml
 import os
+import io
+import hashlib
+import importlib.util
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 import re
-import streamlit as st
+from reporters import NullReporter
+from writers import result_format, write_table
+
+# Formats of submissions files by extension
+SUBMISSION_FORMATS = ("xlsx", "csv", "parquet", "feather")
+
+# Attempts kept of students with several submissions: the first, the last, the last
+# max_attempts ones, or all of them (the last max_attempts ones if set) to keep the best one
+SUBMISSION_POLICIES = ("first", "last", "last_n", "best")
+
+# Parsed tables by (file hash, parse options), shared by the reruns of the app
+PARSED_CACHE_SIZE = 8
+_parsed_tables = OrderedDict()
+
+
+def file_bytes(file):
+    """Return the content of a path or of a file-like object, e.g. an uploaded file."""
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            return f.read()
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    position = file.tell()
+    data = file.read()
+    file.seek(position)
+    return data
+
+
+def parse_table(data, ext, excel_engine=None, **kwargs):
+    """
+    Parse a submissions-like table, every cell as text and empty cells as "".
+
+    Parameters:
+        data (bytes): File content.
+        ext (str): File extension without the dot.
+        excel_engine (str): pandas engine of Excel files, e.g. "calamine".
+        kwargs: Options of pd.read_excel or pd.read_csv, e.g. header.
+
+    Returns:
+        DataFrame: The table.
+    """
+    buffer = io.BytesIO(data)
+    if ext == "xlsx":
+        if excel_engine == "calamine":
+            if importlib.util.find_spec("python_calamine") is None:
+                print("python-calamine is not installed, use openpyxl")
+                excel_engine = None
+        return pd.read_excel(
+            buffer, dtype=str, keep_default_na=False, engine=excel_engine, **kwargs
+        )
+    if ext == "csv":
+        return pd.read_csv(buffer, dtype=str, keep_default_na=False, **kwargs)
+    # Columnar files keep their types, cast them to the text the checks expect
+    if ext == "parquet":
+        table = pd.read_parquet(buffer)
+    else:
+        table = pd.read_feather(buffer)
+    return table.astype(object).where(table.notna(), "").astype(str)
+
+
+def read_table_cached(file, ext, excel_engine=None, **kwargs):
+    """
+    Parse the table once per file content, unchanged uploads are never parsed again.
+
+    Returns:
+        DataFrame: A copy of the parsed table, free to modify.
+    """
+    data = file_bytes(file)
+    key = (
+        hashlib.sha256(data).hexdigest(),
+        ext,
+        excel_engine,
+        repr(sorted(kwargs.items())),
+    )
+    return _cached(key, lambda: parse_table(data, ext, excel_engine, **kwargs))
+
+
+def _cached(key, build):
+    if key in _parsed_tables:
+        _parsed_tables.move_to_end(key)
+    else:
+        _parsed_tables[key] = build()
+        while len(_parsed_tables) > PARSED_CACHE_SIZE:
+            _parsed_tables.popitem(last=False)
+    return _parsed_tables[key].copy()
+
+
+def excel_header(data, rows=1):
+    """
+    Read the first rows of the first sheet of a workbook without parsing the rest.
+
+    Returns:
+        list: Values of every row.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        return [list(row) for row in sheet.iter_rows(max_row=rows, values_only=True)]
+    finally:
+        workbook.close()
+
+
+def read_match_table(file, id_col, excel_engine=None):
+    """
+    Parse a match list once per file content and index it by the normalized IDs.
+
+    A list with the id column in its first row has a flat header, any other list has a
+    two-level header and its IDs in the first column, like the results written by the app.
+
+    Parameters:
+        file (str or file-like object): Excel match list.
+        id_col (str): Name of the id column.
+        excel_engine (str): pandas engine of Excel files, e.g. "calamine".
+
+    Returns:
+        DataFrame: A copy of the match table, free to modify.
+    """
+    data = file_bytes(file)
+
+    def build():
+        header = excel_header(data)
+        if header and id_col in header[0]:
+            table = parse_table(data, "xlsx", excel_engine)
+            table[id_col] = table[id_col].str.lower().replace(" ", "")
+            return table.set_index(id_col)
+        table = parse_table(data, "xlsx", excel_engine, header=[0, 1], index_col=[0])
+        table.index = table.index.str.lower().str.strip()
+        return table
+
+    key = (hashlib.sha256(data).hexdigest(), "match", id_col, excel_engine)
+    return _cached(key, build)
+
+
+def select_attempts(submissions, id_col, time_col, policy="last", max_attempts=None):
+    """
+    Select the attempts to check with one sort by submission time.
+
+    Attempts with equal times are ordered as in the file, so "first" and "last" keep the
+    earliest row of the file among them.
+
+    Parameters:
+        submissions (DataFrame): Submissions with a datetime64 time column.
+        id_col (str): Name of the id column.
+        time_col (str): Name of the time column.
+        policy (str): One of SUBMISSION_POLICIES.
+        max_attempts (int): Number of attempts kept by "last_n" (1 if None) and "best".
+
+    Returns:
+        DataFrame: Selected submissions in the order of the file, with a new index.
+    """
+    if policy not in SUBMISSION_POLICIES:
+        raise ValueError(
+            f"Unknown submission policy: {policy}, possible values: {', '.join(SUBMISSION_POLICIES)}"
+        )
+    position = np.arange(len(submissions))
+    times = submissions[time_col].to_numpy(dtype="datetime64[ns]")
+    keys = pd.DataFrame({"id": submissions[id_col].to_numpy()})
+    if policy == "first":
+        order = np.lexsort((position, times))
+        kept = keys.iloc[order].drop_duplicates("id", keep="first").index
+    else:
+        order = np.lexsort((-position, times))
+        keys = keys.iloc[order]
+        if policy == "last":
+            kept = keys.drop_duplicates("id", keep="last").index
+        elif policy == "best" and max_attempts is None:
+            kept = keys.index
+        else:
+            rank = keys.groupby("id", sort=False).cumcount(ascending=False)
+            kept = keys.index[rank.to_numpy() < (max_attempts or 1)]
+    return submissions.iloc[np.sort(kept)].reset_index(drop=True)
 
 
 class DataLoader:
-    def __init__(self, config_file, submissions_file):
+    def __init__(self, config_file, submissions_file, reporter=None):
         """
         Initialize a DataLoader instance with configuration and submissions files.
 
         Args: config_file (str or file-like object): The path to the configuration file in YAML format or a file-like
         object. submissions_file (str or file-like object): The path to the submissions file in Excel format or a
-        file-like object.
+        file-like object. reporter (Reporter): Frontend of the messages, nothing is reported if
+        None.
         """
+        self.reporter = reporter or NullReporter()
         self.questions_data_df = None
         self.results = None
         self.match_list = None
         self.match_list_file = None
         self.config_file = config_file
         self.submissions_file = submissions_file
-        self.submissions = self.load_submissions()
         self.config = self.load_config()
         self.system_info = self.config.get("system_info", {})
+        self.submissions = self.load_submissions()
         self.optional_params = [
             param for param in self.system_info.keys() if param not in ["id", "name"]
         ]
@@ -74,21 +253,27 @@ class DataLoader:
                 match_list_file_name = self.match_list_file.name
             except AttributeError:
                 match_list_file_name = filename
-        file_name = file_name if filename is None else filename
         file_name, file_ext = os.path.splitext(match_list_file_name)
+        # The results format of the config replaces the extension of the match list
+        file_format = self.user_inputs.get("results_format") or result_format(
+            match_list_file_name
+        )
+        if file_format is None:
+            file_format = "xlsx"
+        if result_format(file_name + file_ext) != file_format:
+            file_ext = f".{file_format}"
         if short:
-            try:
-                info_columns = merged_df[["Info"]]
-                total_columns = merged_df.filter(like="Total (%)")
-                merged_df = pd.concat([info_columns, total_columns], axis=1)
-                merged_df.columns = pd.MultiIndex.from_tuples(merged_df.columns)
-            except KeyError:
-                total_columns = merged_df.filter(like="Total (%)")
-                merged_df = total_columns
+            # Select the Info and Total (%) columns in place instead of concatenating them
+            selected = [
+                (isinstance(column, tuple) and column[0] == "Info")
+                or "Total (%)" in str(column)
+                for column in merged_df.columns
+            ]
+            merged_df = merged_df.loc[:, selected]
             if "_short" not in file_name:
                 file_name += "_short"
-        merged_df.to_excel(f"{file_name}{file_ext}")
-        st.success(f"Results saved as {file_name}{file_ext}")
+        write_table(merged_df, f"{file_name}{file_ext}", file_format)
+        self.reporter.success(f"Results saved as {file_name}{file_ext}")
 
     def load_config(self):
         """
@@ -104,12 +289,16 @@ class DataLoader:
         file_name, file_ext = os.path.splitext(config_file_name)
         config = None
         if file_ext == ".yml":
-            config = yaml.safe_load(self.config_file)
+            if isinstance(self.config_file, str):
+                with open(self.config_file, encoding="utf-8") as f:
+                    config = yaml.safe_load(f)
+            else:
+                config = yaml.safe_load(self.config_file)
         return config
 
     def load_submissions(self):
         """
-        Load the submissions data from the provided Excel file.
+        Load the submissions data from the provided Excel, CSV, Parquet or Feather file.
 
         Returns:
             pandas.DataFrame: A DataFrame containing the submissions' data.
@@ -119,10 +308,13 @@ class DataLoader:
         else:
             submissions_file_name = self.submissions_file.name
         file_name, file_ext = os.path.splitext(submissions_file_name)
+        file_ext = file_ext.lstrip(".").lower()
         file = None
-        if file_ext == ".xlsx":
-            file = pd.read_excel(
-                self.submissions_file, dtype=str, keep_default_na=False
+        if file_ext in SUBMISSION_FORMATS:
+            file = read_table_cached(
+                self.submissions_file,
+                file_ext,
+                excel_engine=self.system_info.get("excel_engine"),
             )
         return file
 
@@ -140,21 +332,11 @@ class DataLoader:
         file_name, file_ext = os.path.splitext(match_list_file_name)
         file = None
         if file_ext == ".xlsx":
-            file = pd.read_excel(self.match_list_file, dtype=str, keep_default_na=False)
-            if not self.user_inputs["id"] in file.columns:
-                file = pd.read_excel(
-                    self.match_list_file,
-                    dtype=str,
-                    keep_default_na=False,
-                    header=[0, 1],
-                    index_col=[0],
-                )
-                file.index = file.index.str.lower().str.strip()
-            else:
-                file[self.user_inputs["id"]] = (
-                    file[self.user_inputs["id"]].str.lower().replace(" ", "")
-                )
-                file.set_index(self.user_inputs["id"], inplace=True)
+            file = read_match_table(
+                self.match_list_file,
+                self.user_inputs["id"],
+                excel_engine=self.system_info.get("excel_engine"),
+            )
         return file
 
     @staticmethod
@@ -173,17 +355,18 @@ class DataLoader:
             self.submissions[time_] = pd.to_datetime(
                 self.submissions[time_], format=date_format
             )
-            self.submissions["time_column"] = self.submissions[time_].dt.time
-            if self.user_inputs.get("take_first_submission", False):
-                self.submissions = self.submissions.loc[
-                    self.submissions.groupby(id_)["time_column"].idxmin()
-                ]
-            else:
-                self.submissions = self.submissions.loc[
-                    self.submissions.groupby(id_)["time_column"].idxmax()
-                ]
-            self.submissions = self.submissions.drop("time_column", axis=1)
-            self.submissions = self.submissions.sort_index().reset_index(drop=True)
+            policy = self.user_inputs.get("submission_policy") or (
+                "first"
+                if self.user_inputs.get("take_first_submission", False)
+                else "last"
+            )
+            self.submissions = select_attempts(
+                self.submissions,
+                id_,
+                time_,
+                policy,
+                self.user_inputs.get("max_attempts"),
+            )
 
     def process_questions(self):
         """
@@ -0,0 +1,162 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from sources import load_source
+
+# Import names of packages whose pip distribution is named differently
+PIP_NAMES = {
+    "attr": "attrs",
+    "bs4": "beautifulsoup4",
+    "cv2": "opencv-python",
+    "dateutil": "python-dateutil",
+    "docx": "python-docx",
+    "dotenv": "python-dotenv",
+    "PIL": "Pillow",
+    "skimage": "scikit-image",
+    "sklearn": "scikit-learn",
+    "yaml": "PyYAML",
+}
+
+_install_lock = threading.Lock()
+# Outcome of every install attempt by (interpreter, module), each module is tried once
+_installed = {}
+
+
+def python_files(path):
+    """Return the Python file, or all Python files of the folder."""
+    if os.path.isfile(path):
+        return [path] if path.endswith(".py") else []
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        files.extend(os.path.join(root, name) for name in sorted(names))
+    return [file for file in files if file.endswith(".py")]
+
+
+def top_level_imports(path):
+    """
+    Return the top-level names of absolute imports in a Python file or folder.
+    """
+    modules = set()
+    for file in python_files(path):
+        for module, name, _, level in load_source(file).imports:
+            # Relative imports, also `from . import name` with no module, are never installed
+            if level > 0:
+                continue
+            if module is None:
+                modules.add(name.split(".")[0])
+            else:
+                modules.add(module.split(".")[0])
+    return modules
+
+
+def source_folder(path):
+    """Return the folder that tests of the file or folder run from."""
+    return path if os.path.isdir(path) else os.path.dirname(path) or "."
+
+
+def local_modules(folder):
+    """
+    Return the names of modules importable from the folder, they are not installed.
+    """
+    try:
+        return {os.path.splitext(name)[0] for name in os.listdir(folder)}
+    except OSError:
+        return set()
+
+
+def missing_modules(modules, python=sys.executable):
+    """
+    Return the modules that the interpreter cannot import, checked in one subprocess.
+    """
+    modules = sorted(set(modules) - set(sys.stdlib_module_names))
+    if not modules:
+        return []
+    script = (
+        "import importlib.util, json, sys\n"
+        "def missing(name):\n"
+        "    try:\n"
+        "        return importlib.util.find_spec(name) is None\n"
+        "    except Exception:\n"
+        "        return True\n"
+        "print(json.dumps([name for name in json.loads(sys.argv[1]) if missing(name)]))"
+    )
+    try:
+        output = subprocess.run(
+            [python, "-c", script, json.dumps(modules)],
+            capture_output=True,
+            encoding="utf-8",
+            check=True,
+        ).stdout
+        return json.loads(output)
+    except Exception as e:
+        print(f"Unable to check installed modules: {e}")
+        return []
+
+
+def _pip_install(modules, python, wheel_cache):
+    command = [python, "-m", "pip", "install"]
+    if wheel_cache:
+        # Resolve against the local wheel cache only, never the network
+        command += ["--no-index", "--find-links", wheel_cache]
+    command += [PIP_NAMES.get(module, module) for module in modules]
+    try:
+        subprocess.check_call(command)
+        return True
+    except Exception as e:
+        print(e)
+        return False
+
+
+def install_modules(modules, python=sys.executable, wheel_cache=None):
+    """
+    Install the pip distributions of the modules with one pip call.
+
+    Modules that were tried before are not installed again, whatever the outcome was.
+
+    Parameters:
+        modules (list): Top-level module names.
+        python (str): Interpreter to install into.
+        wheel_cache (str): Folder of wheels to install from instead of the package index.
+
+    Returns:
+        bool: Whether all modules are installed.
+    """
+    with _install_lock:
+        new = [module for module in modules if (python, module) not in _installed]
+        if new and _pip_install(new, python, wheel_cache):
+            _installed.update({(python, module): True for module in new})
+        elif len(new) > 1:
+            # One unknown module fails the whole pip call, so try them one by one
+            for module in new:
+                _installed[python, module] = _pip_install([module], python, wheel_cache)
+        elif new:
+            _installed[python, new[0]] = False
+        return all(_installed[python, module] for module in modules)
+
+
+def install_missing(sources, python=sys.executable, wheel_cache=None):
+    """
+    Install the modules imported by the sources that the interpreter cannot import yet.
+
+    Parameters:
+        sources (list): Python files or folders, e.g. submissions and their tests.
+        python (str): Interpreter the tests run with.
+        wheel_cache (str): Folder of wheels to install from instead of the package index.
+
+    Returns:
+        list: Missing modules that could not be installed.
+    """
+    imported = set()
+    for path in sources:
+        imported |= top_level_imports(path)
+    local = set()
+    for folder in {source_folder(path) for path in sources}:
+        local |= local_modules(folder)
+    missing = missing_modules(imported - local, python)
+    if not missing or install_modules(missing, python, wheel_cache):
+        return []
+    return [module for module in missing if not _installed[python, module]]
@@ -0,0 +1,158 @@
+import os
+import re
+import tempfile
+import time
+from functools import lru_cache
+
+from executors import run_tasks
+
+YADISK_CLIENT_URL = "https://disk.yandex.ru/client/disk/"
+
+# Download steps of check chains and the extension of the downloaded file
+DOWNLOAD_METHODS = ("code", "project", "data")
+
+
+def yadisk_path(url):
+    """
+    Convert a Yandex Disk client link to the path of the file on the disk.
+    """
+    if "idApp=" in url and "idDialog=" in url:
+        # New format: drop the substring from `?idApp=` up to the last `%2F`
+        url = re.sub(r"\?idApp=.*%2F", "/", url)
+        # Replace any remaining `%2F` with `/` to finalize the format
+        url = url.replace("%2F", "/")
+    return url.split(YADISK_CLIENT_URL)[-1]
+
+
+def download_extension(plan):
+    """
+    Return the extension of the file downloaded by the check plan, None if it downloads nothing.
+    """
+    for method_name, _ in plan.steps:
+        if method_name in DOWNLOAD_METHODS:
+            return (
+                plan.kwargs.get("extension", "csv") if method_name == "data" else "py"
+            )
+    return None
+
+
+def _stand_in_session(api_url):
+    """
+    Return a requests session of yadisk that sends the disk API requests to api_url.
+    """
+    from yadisk import settings
+    from yadisk.sessions.requests_session import RequestsSession
+
+    class StandInSession(RequestsSession):
+        def send_request(self, method, url, **kwargs):
+            if url.startswith(settings.BASE_API_URL):
+                url = api_url.rstrip("/") + url[len(settings.BASE_API_URL) :]
+            return super().send_request(method, url, **kwargs)
+
+    return StandInSession()
+
+
+class YaDiskDownloader:
+    """Downloads submission files from Yandex Disk with one shared client."""
+
+    def __init__(self, token="", workers=8, retries=3, backoff=1.0, api_url=None):
+        """
+        Initialize the downloader.
+
+        Parameters:
+            token (str): Yandex Disk authorization token.
+            workers (int): Maximum number of concurrent downloads.
+            retries (int): Number of retries of a failed download.
+            backoff (float): Delay before the first retry in seconds, doubled on every retry.
+            api_url (str): Base URL of the disk API, e.g. a local stand-in for testing.
+        """
+        import yadisk
+
+        # The requests session keeps a keep-alive connection pool per worker thread,
+        # a stand-in API is used by this client only
+        session = _stand_in_session(api_url) if api_url else "requests"
+        self.client = yadisk.Client(token=token, session=session)
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+
+    def download(self, url, filepath):
+        """
+        Download the file into filepath, partial files are never left at filepath.
+        """
+        import yadisk
+
+        folder = os.path.dirname(filepath) or "."
+        os.makedirs(folder, exist_ok=True)
+        for attempt in range(self.retries + 1):
+            fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+            os.close(fd)
+            try:
+                self.client.download(yadisk_path(url), tmp_path, n_retries=0)
+                os.replace(tmp_path, filepath)
+                return filepath
+            except (
+                yadisk.exceptions.PathNotFoundError,
+                yadisk.exceptions.ForbiddenError,
+                yadisk.exceptions.UnauthorizedError,
+            ):
+                raise
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2**attempt)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def _try_download(self, url, filepath):
+        try:
+            self.download(url, filepath)
+            return None
+        except Exception as e:
+            return e
+
+    def download_all(self, jobs, on_done=None):
+        """
+        Download (url, filepath) jobs concurrently.
+
+        Returns:
+            dict: Errors of the failed downloads by filepath.
+        """
+        errors = run_tasks(
+            self._try_download,
+            jobs,
+            mode="thread",
+            workers=self.workers,
+            on_done=on_done,
+        )
+        return {
+            filepath: error
+            for (_, filepath), error in zip(jobs, errors)
+            if error is not None
+        }
+
+
+@lru_cache(maxsize=None)
+def _cached_downloader(token, workers, retries, backoff, api_url):
+    return YaDiskDownloader(token, workers, retries, backoff, api_url)
+
+
+def get_downloader(kwargs):
+    """
+    Return the downloader shared by all checks with the same download parameters.
+    """
+    return _cached_downloader(
+        kwargs.get("yatoken", "") or "",
+        int(kwargs.get("download_workers", 8) or 8),
+        int(kwargs.get("download_retries", 3) or 0),
+        float(kwargs.get("download_backoff", 1.0) or 0),
+        kwargs.get("yadisk_api_url"),
+    )
+
+
+def is_url(answer):
+    """Check whether the answer is a link, e.g. to a file on Yandex Disk."""
+    import validators
+
+    return isinstance(answer, str) and bool(validators.url(answer))
@@ -0,0 +1,49 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+EXECUTOR_MODES = ("serial", "thread", "process")
+
+
+def default_workers(mode):
+    """Return the default number of workers for the given executor mode."""
+    if mode == "serial":
+        return 1
+    cpu_count = os.cpu_count() or 1
+    # Checks are mostly I/O bound (downloads, subprocesses), so threads can oversubscribe
+    return cpu_count * 2 if mode == "thread" else cpu_count
+
+
+def run_tasks(func, tasks, mode="serial", workers=None, on_done=None):
+    """
+    Run func(*task) for every task and return the results in the order of tasks.
+
+    Parameters:
+        func (callable): Function to call, must be picklable for the "process" mode.
+        tasks (list): List of argument tuples.
+        mode (str): One of "serial", "thread" or "process".
+        workers (int): Number of workers, defaults to default_workers(mode).
+        on_done (callable): Called as on_done(index, done_count) in the calling thread
+            after each task has finished.
+    """
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(
+            f"Unknown executor mode: {mode}, possible values: {', '.join(EXECUTOR_MODES)}"
+        )
+    results = [None] * len(tasks)
+    workers = int(workers) if workers else default_workers(mode)
+    if mode == "serial" or workers <= 1 or len(tasks) <= 1:
+        for i, task in enumerate(tasks):
+            results[i] = func(*task)
+            if on_done is not None:
+                on_done(i, i + 1)
+        return results
+
+    pool_class = ThreadPoolExecutor if mode == "thread" else ProcessPoolExecutor
+    with pool_class(max_workers=min(workers, len(tasks))) as pool:
+        futures = {pool.submit(func, *task): i for i, task in enumerate(tasks)}
+        for done_count, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            results[i] = future.result()
+            if on_done is not None:
+                on_done(i, done_count)
+    return results
@@ -0,0 +1,98 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Backends of soft checks, "auto" is rapidfuzz if it is installed and fuzzywuzzy otherwise
+FUZZY_BACKENDS = ("auto", "rapidfuzz", "fuzzywuzzy")
+
+# fuzzywuzzy gives the same grades as earlier releases, rapidfuzz is opted in per config
+DEFAULT_FUZZY_BACKEND = "fuzzywuzzy"
+
+# Preprocessing of fuzzywuzzy's WRatio: characters 128-255 are dropped, other non-word
+# characters become spaces
+_NON_ASCII = dict.fromkeys(range(128, 256))
+_NON_WORD = re.compile(r"(?ui)\W")
+
+
+@lru_cache(maxsize=4096)
+def full_process(s):
+    """Normalize a string like fuzzywuzzy's WRatio does before scoring."""
+    return _NON_WORD.sub(" ", s.lower().translate(_NON_ASCII)).lower().strip()
+
+
+class RapidFuzzBackend:
+    """WRatio of rapidfuzz, scores all answers in one C call."""
+
+    name = "rapidfuzz"
+
+    def __init__(self):
+        from rapidfuzz import fuzz, process
+
+        self.scorer = fuzz.WRatio
+        self.process = process
+
+    def score(self, correct, answers):
+        scores = self.process.cdist(
+            [correct], answers, scorer=self.scorer, processor=None, dtype=np.float64
+        )[0]
+        return np.rint(scores).astype(np.int_)
+
+
+class FuzzyWuzzyBackend:
+    """WRatio of fuzzywuzzy, pure Python without python-Levenshtein."""
+
+    name = "fuzzywuzzy"
+
+    def __init__(self):
+        from fuzzywuzzy import fuzz
+
+        self.scorer = fuzz.WRatio
+
+    def score(self, correct, answers):
+        return np.array(
+            [self.scorer(correct, answer, full_process=False) for answer in answers],
+            dtype=np.int_,
+        )
+
+
+@lru_cache(maxsize=None)
+def get_backend(name=DEFAULT_FUZZY_BACKEND):
+    """
+    Return the fuzzy backend of the name, the fuzzywuzzy one if rapidfuzz is not installed.
+    """
+    if name not in FUZZY_BACKENDS:
+        print(f"Unknown fuzzy_backend {name}, use {DEFAULT_FUZZY_BACKEND}")
+        name = DEFAULT_FUZZY_BACKEND
+    if name in ("auto", "rapidfuzz"):
+        try:
+            return RapidFuzzBackend()
+        except ImportError:
+            if name == "rapidfuzz":
+                print("rapidfuzz is not installed, use fuzzywuzzy")
+    return FuzzyWuzzyBackend()
+
+
+def wratio(correct, answers, backend=DEFAULT_FUZZY_BACKEND):
+    """
+    Score the answers against the correct one with WRatio, every distinct answer once.
+
+    Parameters:
+        correct (str): Correct answer.
+        answers (list): Submitted answers, converted to strings.
+        backend (str): Name of the fuzzy backend.
+
+    Returns:
+        ndarray: Integer scores from 0 to 100, 0 for answers with no letters or digits.
+    """
+    codes, uniques = pd.factorize(pd.Series(answers, dtype=object).astype(str))
+    scores = np.zeros(len(uniques), dtype=np.int_)
+    correct = full_process(str(correct))
+    processed = [full_process(answer) for answer in uniques]
+    valid = [i for i, answer in enumerate(processed) if answer]
+    if correct and valid:
+        scores[valid] = get_backend(backend).score(
+            correct, [processed[i] for i in valid]
+        )
+    return scores[codes]
@@ -0,0 +1,272 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def _identity_transformer():
+    # sklearn is imported only when a metric falls back to a sklearn scorer
+    from sklearn.base import BaseEstimator
+
+    class IdentityTransformer(BaseEstimator):
+        def fit(self, X, y=None):
+            # This method does nothing, as we don't need to learn anything from the data
+            return self
+
+        def predict(self, X):
+            # This method returns the input values as they are
+            return X
+
+    IdentityTransformer.__module__ = __name__
+    IdentityTransformer.__qualname__ = "IdentityTransformer"
+    return IdentityTransformer
+
+
+def __getattr__(name):
+    if name == "IdentityTransformer":
+        return _identity_transformer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _mse(y_true, y_pred):
+    return np.mean((y_true - y_pred) ** 2, axis=0)
+
+
+def _rmse(y_true, y_pred):
+    return np.sqrt(_mse(y_true, y_pred))
+
+
+def _mae(y_true, y_pred):
+    return np.mean(np.abs(y_true - y_pred), axis=0)
+
+
+def _medae(y_true, y_pred):
+    return np.median(np.abs(y_true - y_pred), axis=0)
+
+
+def _max_error(y_true, y_pred):
+    return np.max(np.abs(y_true - y_pred), axis=0)
+
+
+def _mape(y_true, y_pred):
+    epsilon = np.finfo(np.float64).eps
+    return np.mean(
+        np.abs(y_pred - y_true) / np.maximum(np.abs(y_true), epsilon), axis=0
+    )
+
+
+def _finite_ratio(numerator, denominator):
+    # Constant targets score 1 when predicted exactly and 0 otherwise, as in sklearn
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = 1 - numerator / denominator
+    constant = denominator == 0
+    score[constant] = np.where(numerator[constant] == 0, 1.0, 0.0)
+    return score
+
+
+def _r2(y_true, y_pred):
+    if len(y_true) < 2:
+        return np.full(y_true.shape[1], np.nan)
+    numerator = np.sum((y_true - y_pred) ** 2, axis=0)
+    denominator = np.sum((y_true - np.mean(y_true, axis=0)) ** 2, axis=0)
+    return _finite_ratio(numerator, denominator)
+
+
+def _explained_variance(y_true, y_pred):
+    numerator = np.var(y_true - y_pred, axis=0)
+    denominator = np.var(y_true, axis=0)
+    return _finite_ratio(numerator, denominator)
+
+
+def _accuracy(y_true, y_pred):
+    return np.mean(y_true == y_pred, axis=0)
+
+
+def _confusion(y_true, y_pred):
+    true_positive = np.sum((y_true == 1) & (y_pred == 1), axis=0)
+    false_positive = np.sum((y_true != 1) & (y_pred == 1), axis=0)
+    false_negative = np.sum((y_true == 1) & (y_pred != 1), axis=0)
+    return true_positive, false_positive, false_negative
+
+
+def _safe_divide(numerator, denominator):
+    # Undefined scores are 0, like zero_division="warn" in sklearn
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, 0.0)
+
+
+def _precision(y_true, y_pred):
+    true_positive, false_positive, _ = _confusion(y_true, y_pred)
+    return _safe_divide(true_positive, true_positive + false_positive)
+
+
+def _recall(y_true, y_pred):
+    true_positive, _, false_negative = _confusion(y_true, y_pred)
+    return _safe_divide(true_positive, true_positive + false_negative)
+
+
+def _f1(y_true, y_pred):
+    true_positive, false_positive, false_negative = _confusion(y_true, y_pred)
+    return _safe_divide(
+        2 * true_positive, 2 * true_positive + false_positive + false_negative
+    )
+
+
+# Metric kernels over the columns of 2-D arrays: name -> (kernel, kind)
+KERNELS = {
+    "mse": (_mse, "regression"),
+    "rmse": (_rmse, "regression"),
+    "mae": (_mae, "regression"),
+    "medae": (_medae, "regression"),
+    "max_error": (_max_error, "regression"),
+    "mape": (_mape, "regression"),
+    "r2": (_r2, "regression"),
+    "explained_variance": (_explained_variance, "regression"),
+    "accuracy": (_accuracy, "classification"),
+    "precision": (_precision, "binary"),
+    "recall": (_recall, "binary"),
+    "f1": (_f1, "binary"),
+}
+
+# Other names of the kernels: name -> (kernel name, sign), sklearn scorer names keep
+# their sklearn sign, e.g. "neg_mean_squared_error" and "max_error" are negative
+ALIASES = {
+    "mean_squared_error": ("mse", 1),
+    "root_mean_squared_error": ("rmse", 1),
+    "mean_absolute_error": ("mae", 1),
+    "median_absolute_error": ("medae", 1),
+    "mean_absolute_percentage_error": ("mape", 1),
+    "neg_mean_squared_error": ("mse", -1),
+    "neg_root_mean_squared_error": ("rmse", -1),
+    "neg_mean_absolute_error": ("mae", -1),
+    "neg_median_absolute_error": ("medae", -1),
+    "neg_mean_absolute_percentage_error": ("mape", -1),
+    "max_error": ("max_error", -1),
+    "r2_score": ("r2", 1),
+    "explained_variance_score": ("explained_variance", 1),
+    "accuracy_score": ("accuracy", 1),
+    "precision_score": ("precision", 1),
+    "recall_score": ("recall", 1),
+    "f1_score": ("f1", 1),
+}
+
+
+def _regression_columns(columns):
+    y = np.column_stack([np.asarray(column, dtype=np.float64) for column in columns])
+    if not np.isfinite(y).all():
+        raise ValueError("Input contains NaN or infinity.")
+    return y
+
+
+def _classification_column(column):
+    y = np.asarray(column)
+    if y.dtype.kind == "f":
+        if not np.isfinite(y).all():
+            raise ValueError("Input contains NaN or infinity.")
+        if (y != np.floor(y)).any():
+            raise ValueError("Classification metrics can't handle continuous targets")
+    return y
+
+
+def _check_labels(y_true, y_pred):
+    if (y_true.dtype.kind in "OSU") != (y_pred.dtype.kind in "OSU"):
+        raise ValueError("Mix of label input types (string and number)")
+
+
+def _check_binary(y_true, y_pred):
+    labels = np.union1d(y_true, y_pred)
+    if len(labels) > 2:
+        raise ValueError("Target is multiclass but average='binary'.")
+    if len(labels) == 2 and 1 not in labels:
+        raise ValueError(
+            f"pos_label=1 is not a valid label. It should be one of {labels}"
+        )
+
+
+@dataclass(frozen=True)
+class Metric:
+    """Scoring function of data checks, a NumPy kernel or a sklearn scorer."""
+
+    name: str
+    kernel: object = None
+    kind: str = "regression"
+    sign: int = 1
+
+    def score_columns(self, y_true, y_pred):
+        """
+        Score every pair of columns.
+
+        Parameters:
+            y_true (list): Columns of true values (the submitted columns, as sklearn scorers get them).
+            y_pred (list): Columns of predicted values of the same lengths.
+
+        Returns:
+            list: A score or the exception raised for every column.
+        """
+        if not y_true:
+            return []
+        if self.kernel is None:
+            return [self._score_sklearn(t, p) for t, p in zip(y_true, y_pred)]
+        if len(y_true[0]) == 0:
+            error = ValueError("Found array with 0 sample(s)")
+            return [error for _ in y_true]
+        if self.kind == "regression":
+            try:
+                # All columns at once, one by one only to single out the bad ones
+                scores = self.kernel(
+                    _regression_columns(y_true), _regression_columns(y_pred)
+                )
+                return [self.sign * float(score) for score in scores]
+            except (TypeError, ValueError):
+                pass
+        return [self._score_kernel(t, p) for t, p in zip(y_true, y_pred)]
+
+    def _score_kernel(self, y_true, y_pred):
+        try:
+            if self.kind == "regression":
+                y_true = _regression_columns([y_true])
+                y_pred = _regression_columns([y_pred])
+            else:
+                y_true = _classification_column(y_true)
+                y_pred = _classification_column(y_pred)
+                _check_labels(y_true, y_pred)
+                if self.kind == "binary":
+                    _check_binary(y_true, y_pred)
+                y_true, y_pred = y_true.reshape(-1, 1), y_pred.reshape(-1, 1)
+            return self.sign * float(self.kernel(y_true, y_pred)[0])
+        except Exception as e:
+            return e
+
+    def _score_sklearn(self, y_true, y_pred):
+        try:
+            scorer = _sklearn_scorer(self.name)
+            return scorer(_identity_transformer()(), y_pred, y_true)
+        except Exception as e:
+            return e
+
+
+@lru_cache(maxsize=None)
+def _sklearn_scorer(name):
+    import sklearn.metrics
+
+    return sklearn.metrics.get_scorer(name)
+
+
+@lru_cache(maxsize=None)
+def get_metric(name):
+    """
+    Resolve a metric name once: a kernel name ("mse", "r2", ...), a sklearn name
+    ("neg_mean_squared_error", "f1", ...) or any kernel name with the "neg_" prefix.
+    Other names are scored by the sklearn scorer of that name.
+    """
+    if name in ALIASES:
+        kernel_name, sign = ALIASES[name]
+    elif name in KERNELS:
+        kernel_name, sign = name, 1
+    elif name.startswith("neg_") and name[4:] in KERNELS:
+        kernel_name, sign = name[4:], -1
+    else:
+        return Metric(name)
+    kernel, kind = KERNELS[kernel_name]
+    return Metric(name, kernel, kind, sign)
@@ -0,0 +1,99 @@
+import numpy as np
+
+# Penalty formulas by name, each one maps the lateness of all submissions to coefficients
+PENALTIES = {}
+
+
+def register_penalty(name):
+    """
+    Register a penalty formula under the name.
+
+    The formula is called as formula(late_minutes, **penalty_params) with a float array of
+    minutes after the deadline (negative before it, NaN for unknown times) and returns
+    an array of coefficients.
+    """
+
+    def register(formula):
+        PENALTIES[name] = formula
+        return formula
+
+    return register
+
+
+def round_coefficients(values):
+    """Round every value like np.round(value, number_of_dec(value)) in check.py."""
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide="ignore"):
+        decimals = np.abs(np.minimum(np.log10(np.abs(values)), -2))
+    decimals = np.where(values == 0, 2, decimals).astype(np.int64)
+    factor = 10.0**decimals
+    return np.rint(values * factor) / factor
+
+
+@register_penalty("exact")
+def exact_penalty(late_minutes, **kwargs):
+    """Full points before the deadline, nothing after it."""
+    return (late_minutes < 0).astype(np.float64)
+
+
+@register_penalty("none")
+def no_penalty(late_minutes, **kwargs):
+    """No penalty for submissions."""
+    return np.ones(len(late_minutes))
+
+
+@register_penalty("const")
+def const_penalty(late_minutes, start_val=1, **kwargs):
+    """Points multiplied by start_val after the deadline."""
+    return np.where(late_minutes < 0, 1.0, float(start_val))
+
+
+@register_penalty("soft")
+def soft_penalty(late_minutes, start_val=1, power=0.01, duration=30, **kwargs):
+    """Exponential decay from start_val during duration minutes, nothing after it."""
+    with np.errstate(over="ignore", invalid="ignore"):
+        decay = round_coefficients(float(start_val) / np.exp(power * late_minutes))
+    return np.where(
+        late_minutes < 0, 1.0, np.where(late_minutes < duration, decay, 0.0)
+    )
+
+
+@register_penalty("step")
+def step_penalty(late_minutes, step=0.1, period=1440, max_periods=None, **kwargs):
+    """
+    Points reduced by step for every started period (a day by default) after the deadline,
+    nothing after max_periods periods.
+    """
+    with np.errstate(invalid="ignore"):
+        periods = np.ceil(late_minutes / float(period))
+    coefficients = np.clip(1 - float(step) * periods, 0, 1)
+    if max_periods is not None:
+        coefficients = np.where(periods > max_periods, 0.0, coefficients)
+    return np.where(
+        late_minutes < 0, 1.0, np.where(np.isnan(periods), 0.0, coefficients)
+    )
+
+
+def penalty_coefficients(
+    submission_times, deadline_time, penalty_formula="exact", **kwargs
+):
+    """
+    Calculate the penalty coefficients of all submissions at once.
+
+    Parameters:
+        submission_times (array): Submission timestamps, datetime64 or convertible.
+        deadline_time (Timestamp): Deadline.
+        penalty_formula (str): Name of a registered penalty formula.
+        kwargs: Parameters of the formula.
+
+    Returns:
+        ndarray: Coefficient of every submission.
+    """
+    if penalty_formula not in PENALTIES:
+        raise ValueError(
+            f"Unknown penalty formula: {penalty_formula}, possible values: {', '.join(PENALTIES)}"
+        )
+    times = np.asarray(submission_times, dtype="datetime64[ns]")
+    deadline = np.datetime64(deadline_time, "ns")
+    late_minutes = (times - deadline) / np.timedelta64(1, "m")
+    return PENALTIES[penalty_formula](late_minutes, **kwargs)
@@ -0,0 +1,61 @@
+import warnings
+from functools import lru_cache
+
+import numpy as np
+
+
+def _finite(errors):
+    return errors[~np.isnan(errors)]
+
+
+def weighted_mean(errors, weights=None, **kwargs):
+    """Mean of the errors weighted per column, failed columns are left out."""
+    if weights is None:
+        return np.nanmean(errors)
+    weights = np.asarray(weights, dtype=np.float64)[: len(errors)]
+    mask = ~np.isnan(errors[: len(weights)])
+    if not mask.any() or weights[mask].sum() == 0:
+        return np.nan
+    return np.average(errors[: len(weights)][mask], weights=weights[mask])
+
+
+def trimmed_mean(errors, trim=0.1, **kwargs):
+    """Mean of the errors without the trim share of the lowest and of the highest ones."""
+    errors = np.sort(_finite(errors))
+    cut = int(trim * len(errors))
+    return np.mean(errors[cut : len(errors) - cut]) if len(errors) > 2 * cut else np.nan
+
+
+# Reducers of the per-column errors of data checks, failed columns are NaN
+REDUCERS = {
+    "mean": lambda errors, **kwargs: np.nanmean(errors),
+    "min": lambda errors, **kwargs: np.nanmin(errors),
+    "max": lambda errors, **kwargs: np.nanmax(errors),
+    "median": lambda errors, **kwargs: np.nanmedian(errors),
+    "sum": lambda errors, **kwargs: np.sum(_finite(errors)),
+    "std": lambda errors, **kwargs: np.nanstd(errors),
+    "weighted_mean": weighted_mean,
+    "trimmed_mean": trimmed_mean,
+}
+
+
+@lru_cache(maxsize=None)
+def get_reducer(name):
+    """
+    Return the reducer of the name, the mean for unknown names.
+    """
+    if name not in REDUCERS:
+        print(f"Unknown sum_points_method {name}, use mean")
+        name = "mean"
+    reducer = REDUCERS[name]
+
+    def reduce(errors, **kwargs):
+        # Only failed columns give NaN, e.g. the min of no errors at all
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            try:
+                return reducer(errors, **kwargs)
+            except ValueError:
+                return np.nan
+
+    return reduce
@@ -0,0 +1,116 @@
+import sys
+from contextlib import contextmanager
+
+
+class Progress:
+    """Progress bar of one stage, does nothing by itself."""
+
+    def update(self, fraction, text=""):
+        """Show the share of the stage done, from 0 to 1."""
+
+    def close(self):
+        """Remove the progress bar when the stage is over."""
+
+
+class Reporter:
+    """
+    Frontend of the progress of Check and DataLoader, the base class reports nothing.
+
+    Subclasses override the methods they can show, so grading runs the same way in the
+    Streamlit app, in a terminal or in a cron job.
+    """
+
+    def progress(self, text):
+        """Start a progress bar of a stage."""
+        return Progress()
+
+    @contextmanager
+    def status(self, text):
+        """Show the text while the block runs."""
+        yield
+
+    def success(self, text):
+        """Report a finished action."""
+
+    def error(self, text):
+        """Report a problem that does not stop grading."""
+
+
+class NullReporter(Reporter):
+    """Reporter of headless runs that keeps quiet."""
+
+
+class _ConsoleProgress(Progress):
+    def __init__(self, stream, text):
+        self.stream = stream
+        self.text = text
+        self.percent = -1
+
+    def update(self, fraction, text=""):
+        # Only whole percents are written, so logs of large cohorts stay short
+        percent = int(fraction * 100)
+        if percent != self.percent:
+            self.percent = percent
+            first_line = (text or self.text).splitlines()[0]
+            self.stream.write(f"\r{first_line} {percent}%")
+            self.stream.flush()
+
+    def close(self):
+        if self.percent >= 0:
+            self.stream.write("\n")
+            self.stream.flush()
+
+
+class ConsoleReporter(Reporter):
+    """Reporter of terminal runs, writes to stderr so stdout keeps only the results."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+
+    def progress(self, text):
+        return _ConsoleProgress(self.stream, text)
+
+    @contextmanager
+    def status(self, text):
+        print(text, file=self.stream)
+        yield
+
+    def success(self, text):
+        print(text, file=self.stream)
+
+    def error(self, text):
+        print(f"Error: {text}", file=self.stream)
+
+
+class _StreamlitProgress(Progress):
+    def __init__(self, st, text):
+        self.bar = st.progress(0, text=text)
+
+    def update(self, fraction, text=""):
+        self.bar.progress(fraction, text=text)
+
+    def close(self):
+        self.bar.empty()
+
+
+class StreamlitReporter(Reporter):
+    """Reporter of the Streamlit app, Streamlit is imported only when it is used."""
+
+    def __init__(self):
+        import streamlit
+
+        self.st = streamlit
+
+    def progress(self, text):
+        return _StreamlitProgress(self.st, text)
+
+    @contextmanager
+    def status(self, text):
+        with self.st.spinner(text):
+            yield
+
+    def success(self, text):
+        self.st.success(text)
+
+    def error(self, text):
+        self.st.error(text)
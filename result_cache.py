@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# Grading-level parameters that never change the outcome of a single check
+IGNORED_KWARGS = (
+    "yatoken",
+    "force_download",
+    "invalidate_cache",
+    "result_cache",
+    "result_cache_max_age_days",
+    "result_cache_max_entries",
+    "executor",
+    "workers",
+    "penalty_params",
+    "eval_formula",
+    "name",
+    "time",
+    "take_first_submission",
+    "submission_policy",
+    "max_attempts",
+    "non-questions_columns",
+    "download_workers",
+    "download_retries",
+    "download_backoff",
+    "yadisk_api_url",
+    "prefetched",
+    "warm_runner",
+    "runner_workers",
+    "preload_modules",
+    "install_missing",
+    "wheel_cache",
+)
+
+
+def hash_path(path, hasher, exclude=()):
+    """Feed the contents of a file, or of every file in a folder, into hasher."""
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            for name in sorted(files):
+                if name in exclude or name.endswith(".pyc"):
+                    continue
+                file_path = os.path.join(root, name)
+                hasher.update(os.path.relpath(file_path, path).encode("utf-8"))
+                hash_path(file_path, hasher)
+    elif os.path.isfile(path):
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(chunk)
+    else:
+        hasher.update(f"<missing {path}>".encode("utf-8"))
+
+
+def make_key(method_name, paths, kwargs, exclude=()):
+    """
+    Build a content-addressed key of one check.
+
+    Parameters:
+        method_name (str): Check method, e.g. "code".
+        paths (list): Submission and correct/test files or folders.
+        kwargs (dict): Check keyword arguments, grading-level ones are ignored.
+        exclude (tuple): File names skipped when hashing folders.
+    """
+    hasher = hashlib.sha256(method_name.encode("utf-8"))
+    for path in paths:
+        hasher.update(b"\0")
+        hash_path(path, hasher, exclude)
+    relevant_kwargs = {k: v for k, v in kwargs.items() if k not in IGNORED_KWARGS}
+    hasher.update(json.dumps(relevant_kwargs, sort_keys=True, default=str).encode())
+    return hasher.hexdigest()
+
+
+class ResultCache:
+    """Persistent SQLite cache of (result, comment) of expensive checks."""
+
+    def __init__(
+        self,
+        folder,
+        max_age_days=30,
+        max_entries=100000,
+        filename="results_cache.sqlite",
+    ):
+        """
+        Initialize the cache stored in the given folder.
+
+        Parameters:
+            folder (str): Folder of the cache database, usually submission_folder.
+            max_age_days (float): Entries not used for longer are evicted.
+            max_entries (int): Least recently used entries above this number are evicted.
+            filename (str): Name of the cache database.
+        """
+        os.makedirs(folder, exist_ok=True)
+        self.path = os.path.join(folder, filename)
+        self.max_age_days = max_age_days
+        self.max_entries = max_entries
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "key TEXT PRIMARY KEY, result TEXT, comment TEXT, "
+                    "created REAL, accessed REAL)"
+                )
+        finally:
+            connection.close()
+
+    def _connect(self):
+        # A short-lived connection per operation, so the cache works from threads and processes
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def get(self, key):
+        """Return the cached (result, comment) or None."""
+        connection = self._connect()
+        try:
+            with connection:
+                row = connection.execute(
+                    "SELECT result, comment FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                connection.execute(
+                    "UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key)
+                )
+        finally:
+            connection.close()
+        return json.loads(row[0]), json.loads(row[1])
+
+    def put(self, key, result, comment):
+        """Store (result, comment) under the key."""
+        result = result.item() if hasattr(result, "item") else result
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        json.dumps(result),
+                        json.dumps(comment, default=str),
+                        now,
+                        now,
+                    ),
+                )
+        finally:
+            connection.close()
+
+    def evict(self):
+        """Remove entries older than max_age_days and the least recently used above max_entries."""
+        connection = self._connect()
+        try:
+            with connection:
+                if self.max_age_days is not None:
+                    connection.execute(
+                        "DELETE FROM results WHERE accessed < ?",
+                        (time.time() - float(self.max_age_days) * 86400,),
+                    )
+                if self.max_entries is not None:
+                    connection.execute(
+                        "DELETE FROM results WHERE key NOT IN "
+                        "(SELECT key FROM results ORDER BY accessed DESC LIMIT ?)",
+                        (int(self.max_entries),),
+                    )
+        finally:
+            connection.close()
+
+    def clear(self):
+        """Remove all entries."""
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM results")
+        finally:
+            connection.close()
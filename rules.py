@@ -0,0 +1,142 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# Conditions of eval_formula rules: name -> test of the question scores against the threshold
+RULE_CONDITIONS = {
+    "pass": np.greater_equal,
+    "fail": np.less,
+}
+
+# Actions of eval_formula rules and the value used when the rule gives none
+RULE_ACTIONS = {
+    "reweight": 1.0,
+    "set": 0.0,
+}
+
+
+def _number(s, default=None):
+    try:
+        return float(s)
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class RuleAction:
+    """Action of a rule, e.g. `all_reweight_0.5` or `q3_set_0`."""
+
+    target: str
+    kind: str
+    value: float
+
+
+@dataclass
+class Rule:
+    """Condition on the score of one question and the actions taken where it holds."""
+
+    question: str
+    condition: str
+    threshold: float
+    actions: list = field(default_factory=list)
+
+
+def compile_rules(eval_formulas):
+    """
+    Parse the eval_formula list once, invalid conditions and actions are skipped.
+
+    Parameters:
+        eval_formulas (list): Dicts of question -> [condition, action, ...].
+
+    Returns:
+        list: Rules in the order of the formulas.
+    """
+    rules = []
+    for eval_formula in eval_formulas or []:
+        for q, formula in eval_formula.items():
+            condition = formula[0].split("_")
+            threshold = _number(condition[1]) if len(condition) > 1 else None
+            if condition[0] not in RULE_CONDITIONS or threshold is None:
+                continue
+            rule = Rule(q, condition[0], threshold)
+            for action in formula[1:]:
+                parts = action.split("_")
+                kind = parts[1] if len(parts) > 1 else None
+                if kind not in RULE_ACTIONS:
+                    continue
+                if parts[0] != "all" and not parts[0].startswith("q"):
+                    continue
+                value = _number(parts[2], None) if len(parts) > 2 else None
+                if value is None:
+                    value = RULE_ACTIONS[kind]
+                rule.actions.append(RuleAction(parts[0], kind, value))
+            rules.append(rule)
+    return rules
+
+
+def rule_targets(rules, questions):
+    """Return the questions whose scores the rules can change."""
+    targets = set()
+    for rule in rules:
+        if rule.question not in questions:
+            continue
+        for action in rule.actions:
+            targets.update(
+                target
+                for target in (questions if action.target == "all" else [action.target])
+                if target != rule.question
+            )
+    return targets & set(questions)
+
+
+def apply_rules(scores, questions, weights, rules):
+    """
+    Apply the rules to the score matrix and weight it.
+
+    A question gets the multiplier of the last reweight rule and the values of the last
+    set rule targeting it. Set values replace the weighted scores, and a reweight rule
+    applies to them only if it first targeted the question after a set rule.
+
+    Parameters:
+        scores (ndarray): Scores of the students (rows) for the questions (columns).
+        questions (list): Question keys of the columns.
+        weights (ndarray): Weights of the questions.
+        rules (list): Compiled rules.
+
+    Returns:
+        tuple: (weighted scores matrix, total of every student).
+    """
+    columns = {q: j for j, q in enumerate(questions)}
+    multipliers = {}
+    values = {}
+    # Per question, the order in which its reweight and set actions first appear
+    order = {}
+    for rule in rules:
+        if rule.question not in columns:
+            continue
+        mask = RULE_CONDITIONS[rule.condition](
+            scores[:, columns[rule.question]], rule.threshold
+        )
+        for action in rule.actions:
+            targets = questions if action.target == "all" else [action.target]
+            for target in targets:
+                if target == rule.question or target not in columns:
+                    continue
+                j = columns[target]
+                if action.kind == "reweight":
+                    multipliers[j] = np.where(mask, action.value, 1.0)
+                else:
+                    values[j] = np.where(mask, action.value, scores[:, j])
+                kinds = order.setdefault(j, [])
+                if action.kind not in kinds:
+                    kinds.append(action.kind)
+
+    effective = np.array(scores, dtype=np.float64)
+    effective_weights = np.array(weights, dtype=np.float64)
+    for j, kinds in order.items():
+        if j in values:
+            effective[:, j] = values[j]
+            effective_weights[j] = 1.0
+        if kinds == ["reweight"] or kinds == ["set", "reweight"]:
+            effective[:, j] *= multipliers[j]
+    return effective * effective_weights, effective @ effective_weights
@@ -0,0 +1,507 @@
+import atexit
+import json
+import math
+import os
+import queue
+import re
+import select
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Modules imported once by every runner process and shared by all forked test runs
+DEFAULT_PRELOAD = ("unittest", "numpy", "pandas", "sklearn")
+
+# Statuses of single tests counted as passed, skipped tests are not counted at all
+PASSED_STATUSES = ("passed", "expected_failure")
+
+# Last line of a traceback of MemoryError, e.g. raised while importing the tested code
+MEMORY_ERROR_LINE = re.compile(r"^MemoryError\b", re.MULTILINE)
+
+
+@dataclass
+class TestRun:
+    """Outcome of one run of a test file."""
+
+    returncode: int
+    stdout: str = ""
+    stderr: str = ""
+    timed_out: bool = False
+    # Records {"id", "status", "duration"} of single tests, plus "exception" for errors,
+    # None if unittest reported nothing
+    tests: list = None
+
+    def count(self):
+        """
+        Count the tests run and passed according to the test records.
+
+        Returns:
+            tuple: (tests_run, tests_passed), skipped tests are left out.
+        """
+        counted = [test for test in self.tests if test["status"] != "skipped"]
+        passed = sum(test["status"] in PASSED_STATUSES for test in counted)
+        return len(counted), passed
+
+    def memory_error(self):
+        """Whether a test, or the test file itself if no test reported, raised MemoryError."""
+        if self.tests is not None:
+            return any(test.get("exception") == "MemoryError" for test in self.tests)
+        return MEMORY_ERROR_LINE.search(self.stderr) is not None
+
+
+class RecordingTestResult(unittest.TextTestResult):
+    """
+    Text test result that also writes the status and duration of every test to a JSON file.
+    """
+
+    result_file = None
+    records = {}
+
+    @classmethod
+    def install(cls, result_file):
+        """Make the default unittest runner, e.g. of unittest.main(), use this result class."""
+        cls.result_file = result_file
+        cls.records = {}
+        unittest.TextTestRunner.resultclass = cls
+
+    def startTest(self, test):
+        self._started = time.perf_counter()
+        super().startTest(test)
+
+    def _record(self, test, status, err=None):
+        started = getattr(self, "_started", None)
+        record = self.records.setdefault(test.id(), {"id": test.id()})
+        # A test with a failed subtest stays failed whatever is reported afterwards
+        if record.get("status") not in ("failed", "error"):
+            record["status"] = status
+        if status == "error" and err is not None:
+            record.setdefault("exception", err[0].__name__)
+        record["duration"] = (
+            round(time.perf_counter() - started, 6) if started is not None else 0.0
+        )
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, "passed")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, "failed")
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._record(test, "error", err)
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, "skipped")
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, "expected_failure")
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record(test, "unexpected_success")
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            failed = issubclass(err[0], test.failureException)
+            self._record(test, "failed" if failed else "error", err)
+
+    def stopTestRun(self):
+        super().stopTestRun()
+        if self.result_file:
+            with open(self.result_file, "w", encoding="utf-8") as f:
+                json.dump(list(self.records.values()), f)
+
+
+def _address_space():
+    """Return the virtual memory size of this process in bytes, 0 if unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def limit_resources(max_memory_mb=None, max_cpu_seconds=None):
+    """
+    Limit the memory and the CPU time of this process with rlimits, where supported.
+
+    Parameters:
+        max_memory_mb (float): Memory the process may allocate on top of what it already uses.
+        max_cpu_seconds (float): CPU time the process may spend from now on,
+            it is killed by SIGXCPU when the time is over.
+    """
+    try:
+        import resource
+    except ImportError:
+        return
+
+    def set_limit(kind, soft, hard):
+        _, current_hard = resource.getrlimit(kind)
+        if current_hard != resource.RLIM_INFINITY:
+            soft, hard = min(soft, current_hard), min(hard, current_hard)
+        resource.setrlimit(kind, (soft, hard))
+
+    if max_memory_mb:
+        limit = _address_space() + int(float(max_memory_mb) * 1024 * 1024)
+        set_limit(resource.RLIMIT_AS, limit, limit)
+    if max_cpu_seconds:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        limit = math.ceil(usage.ru_utime + usage.ru_stime + float(max_cpu_seconds))
+        # SIGXCPU at the soft limit, SIGKILL a second later if it is handled
+        set_limit(resource.RLIMIT_CPU, limit, limit + 1)
+
+
+def run_script(test_file_path, cwd, result_file=None, limits=None):
+    """
+    Run the test file from cwd as __main__, like `python test_file`, in this process.
+
+    Parameters:
+        test_file_path (str): Test file, only its name is used.
+        cwd (str): Folder of the test file.
+        result_file (str): JSON file for the per-test records.
+        limits (dict): Keyword arguments of limit_resources.
+
+    Returns:
+        int: Exit code of the script.
+    """
+    import runpy
+
+    os.chdir(cwd)
+    script = os.path.basename(test_file_path)
+    sys.argv = [script]
+    sys.path.insert(0, cwd)
+    if result_file:
+        RecordingTestResult.install(result_file)
+    limit_resources(**(limits or {}))
+    try:
+        runpy.run_path(os.path.join(cwd, script), run_name="__main__")
+        return 0
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+def _new_result_file():
+    fd, result_file = tempfile.mkstemp(prefix="autocheck_tests_", suffix=".json")
+    os.close(fd)
+    os.remove(result_file)
+    return result_file
+
+
+def _read_result_file(result_file):
+    """Load the test records written by RecordingTestResult and remove the file."""
+    try:
+        with open(result_file, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+    finally:
+        if os.path.exists(result_file):
+            os.remove(result_file)
+
+
+def _strip_runner_dir():
+    # Tests import from their own folder only, like a script run by the interpreter
+    runner_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = [
+        path for path in sys.path if os.path.abspath(path or ".") != runner_dir
+    ]
+
+
+def run_test_subprocess(
+    test_file_path, cwd, timeout=None, python=sys.executable, limits=None
+):
+    """
+    Run the test file in a new interpreter.
+
+    Parameters:
+        test_file_path (str): Test file to run.
+        cwd (str): Folder to run the test file from.
+        timeout (float): Wall-clock time limit in seconds, the whole process group is
+            killed when it is over.
+        python (str): Interpreter to run the test file with.
+        limits (dict): Keyword arguments of limit_resources.
+    """
+    job = {
+        "test_file": os.path.basename(test_file_path),
+        "result_file": _new_result_file(),
+        "limits": limits or {},
+    }
+    process = subprocess.Popen(
+        [python, os.path.abspath(__file__), "run", json.dumps(job)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        encoding="utf-8",
+        errors="replace",
+        cwd=cwd,
+        start_new_session=True,
+    )
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        # Kill the processes started by the tests as well, they keep the pipes open
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        process.kill()
+        stdout, stderr = process.communicate()
+        _read_result_file(job["result_file"])
+        return TestRun(-signal.SIGKILL, _decode(stdout), _decode(stderr), True)
+    return TestRun(
+        process.returncode,
+        stdout,
+        stderr,
+        tests=_read_result_file(job["result_file"]),
+    )
+
+
+def _decode(output):
+    if isinstance(output, bytes):
+        return output.decode("utf-8", errors="replace")
+    return output or ""
+
+
+def _wait_child(pid, timeout):
+    """Wait for the child process, return its wait status or None on timeout."""
+    if timeout is not None and hasattr(os, "pidfd_open"):
+        fd = os.pidfd_open(pid)
+        try:
+            ready, _, _ = select.select([fd], [], [], timeout)
+        finally:
+            os.close(fd)
+        if not ready:
+            return None
+    elif timeout is not None:
+        deadline = time.monotonic() + timeout
+        while True:
+            waited_pid, status = os.waitpid(pid, os.WNOHANG)
+            if waited_pid == pid:
+                return status
+            if time.monotonic() > deadline:
+                return None
+            time.sleep(0.01)
+    return os.waitpid(pid, 0)[1]
+
+
+def _run_child(job, stdout_fd, stderr_fd):
+    """Body of the forked child: run the test file as __main__ and exit."""
+    import importlib
+
+    code = 1
+    try:
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        # Packages can be installed between jobs
+        importlib.invalidate_caches()
+        code = run_script(
+            job["test_file"], job["cwd"], job.get("result_file"), job.get("limits")
+        )
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def serve(preload):
+    """
+    Runner process loop: read jobs as JSON lines from stdin, run each one in a forked child.
+    """
+    # Keep the protocol channel private, stray prints go to stderr
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    _strip_runner_dir()
+    for module in preload:
+        try:
+            __import__(module)
+        except Exception:
+            pass
+
+    for line in sys.stdin:
+        job = json.loads(line)
+        with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            pid = os.fork()
+            if pid == 0:
+                _run_child(job, out.fileno(), err.fileno())
+            status = _wait_child(pid, job.get("timeout"))
+            timed_out = status is None
+            if timed_out:
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                status = os.waitpid(pid, 0)[1]
+            out.seek(0)
+            err.seek(0)
+            response = {
+                "returncode": os.waitstatus_to_exitcode(status),
+                "stdout": out.read().decode("utf-8", errors="replace"),
+                "stderr": err.read().decode("utf-8", errors="replace"),
+                "timed_out": timed_out,
+            }
+        protocol.write(json.dumps(response) + "\n")
+        protocol.flush()
+
+
+class TestRunnerPool:
+    """
+    Pool of long-lived runner processes with common modules preloaded.
+
+    Every test file runs in a fresh child forked from a runner, so it pays neither
+    interpreter startup nor the imports of the preloaded modules.
+    """
+
+    def __init__(self, workers=None, preload=DEFAULT_PRELOAD, python=sys.executable):
+        """
+        Initialize the pool, runner processes are started on demand.
+
+        Parameters:
+            workers (int): Maximum number of runner processes, defaults to the CPU count.
+            preload (tuple): Modules imported by every runner process.
+            python (str): Interpreter of the runner processes.
+        """
+        self.max_workers = int(workers or os.cpu_count() or 1)
+        self.preload = tuple(preload)
+        self.python = python
+        # Runners are private to the process that started them, a forked copy of the
+        # pool shares their pipes with the parent
+        self.pid = os.getpid()
+        self.idle = queue.LifoQueue()
+        self.workers = []
+        self.lock = threading.Lock()
+
+    def _start_worker(self):
+        return subprocess.Popen(
+            [
+                self.python,
+                "-u",
+                os.path.abspath(__file__),
+                "serve",
+                ",".join(self.preload),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+            env={**os.environ, "PYTHONIOENCODING": "utf-8"},
+        )
+
+    def _acquire(self):
+        while True:
+            try:
+                return self.idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self.lock:
+                if len(self.workers) < self.max_workers:
+                    worker = self._start_worker()
+                    self.workers.append(worker)
+                    return worker
+            try:
+                return self.idle.get(timeout=1)
+            except queue.Empty:
+                # A busy runner may have died meanwhile, so check the pool size again
+                continue
+
+    def _discard(self, worker):
+        worker.kill()
+        worker.wait()
+        with self.lock:
+            self.workers.remove(worker)
+
+    def run(self, test_file_path, cwd, timeout=None, limits=None):
+        """
+        Run the test file from cwd in a forked child of an idle runner.
+
+        Parameters:
+            test_file_path (str): Test file to run.
+            cwd (str): Folder to run the test file from.
+            timeout (float): Wall-clock time limit in seconds.
+            limits (dict): Keyword arguments of limit_resources.
+        """
+        job = {
+            "test_file": os.path.basename(test_file_path),
+            "cwd": os.path.abspath(cwd),
+            "timeout": timeout,
+            "result_file": _new_result_file(),
+            "limits": limits or {},
+        }
+        worker = self._acquire()
+        try:
+            worker.stdin.write(json.dumps(job) + "\n")
+            worker.stdin.flush()
+            line = worker.stdout.readline()
+            if not line:
+                raise RuntimeError("Test runner process exited")
+            response = json.loads(line)
+        except Exception:
+            self._discard(worker)
+            _read_result_file(job["result_file"])
+            raise
+        self.idle.put(worker)
+        return TestRun(**response, tests=_read_result_file(job["result_file"]))
+
+    def close(self):
+        """Stop the runner processes started by this process."""
+        if os.getpid() != self.pid:
+            return
+        with self.lock:
+            workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.stdin.close()
+            worker.wait()
+
+
+@lru_cache(maxsize=None)
+def _get_pool(pid, workers, preload, python):
+    pool = TestRunnerPool(workers, preload, python)
+    atexit.register(pool.close)
+    return pool
+
+
+def get_pool(workers=None, preload=DEFAULT_PRELOAD, python=sys.executable):
+    """
+    Return the pool of runner processes shared by all checks of this process.
+
+    Pools are cached per PID: worker processes forked by the process executor start
+    their own runners instead of sending jobs through the pipes of the parent's ones.
+    """
+    return _get_pool(os.getpid(), workers, tuple(preload), python)
+
+
+def warm_runner_available():
+    """Warm runners fork a child per test run, which needs POSIX fork."""
+    return hasattr(os, "fork")
+
+
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "serve":
+    serve([module for module in sys.argv[2].split(",") if module])
+elif __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "run":
+    _strip_runner_dir()
+    job = json.loads(sys.argv[2])
+    sys.exit(
+        run_script(job["test_file"], os.getcwd(), job["result_file"], job["limits"])
+    )
@@ -0,0 +1,86 @@
+import ast
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+# Definition types that can be extracted from submitted code
+DEFINITION_TYPES = {"function": ast.FunctionDef, "class": ast.ClassDef}
+
+
+@dataclass
+class SourceIndex:
+    """Python file parsed once, with its definitions and imports indexed in one walk."""
+
+    code: str = ""
+    tree: ast.Module = None
+    # First (type, name) -> node in ast.walk order, nested definitions included
+    definitions: dict = field(default_factory=dict)
+    # (module, name, asname, level) of every imported name, module is None for `import name`
+    # and level is the number of dots of a relative import
+    imports: list = field(default_factory=list)
+    error: Exception = None
+
+    @classmethod
+    def parse(cls, code):
+        """
+        Parse the code and index it, a syntax error is kept in error.
+        """
+        index = cls(code)
+        try:
+            index.tree = ast.parse(code)
+        except Exception as e:
+            index.error = e
+            return index
+        types = {node_type: name for name, node_type in DEFINITION_TYPES.items()}
+        for node in ast.walk(index.tree):
+            if type(node) in types:
+                index.definitions.setdefault((types[type(node)], node.name), node)
+            elif isinstance(node, ast.Import):
+                index.imports.extend(
+                    (None, alias.name, alias.asname, 0) for alias in node.names
+                )
+            elif isinstance(node, ast.ImportFrom):
+                index.imports.extend(
+                    (node.module, alias.name, alias.asname, node.level)
+                    for alias in node.names
+                )
+        return index
+
+    def extract(self, name, code_type="function"):
+        """Return the source of the named function or class, None if it is not defined."""
+        node = self.definitions.get((code_type, name))
+        return ast.unparse(node) if node is not None else None
+
+
+def _file_version(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+@lru_cache(maxsize=4096)
+def _load_source(path, version):
+    with open(path, "r", encoding="utf-8") as f:
+        return SourceIndex.parse(f.read())
+
+
+def load_source(path):
+    """
+    Return the index of the Python file, parsed once while the file is unchanged.
+    """
+    try:
+        return _load_source(os.path.abspath(path), _file_version(path))
+    except Exception as e:
+        return SourceIndex(error=e)
+
+
+@lru_cache(maxsize=128)
+def _read_template(path, version):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def read_template(path):
+    """
+    Return the content of a test template, read once per question while it is unchanged.
+    """
+    return _read_template(os.path.abspath(path), _file_version(path))
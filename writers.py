@@ -0,0 +1,188 @@
+import contextlib
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Formats of results files by extension
+RESULT_FORMATS = {
+    "xlsx": "xlsx",
+    "csv": "csv",
+    "parquet": "parquet",
+    "pq": "parquet",
+    "feather": "feather",
+    "arrow": "feather",
+    "sqlite": "sqlite",
+    "sqlite3": "sqlite",
+    "db": "sqlite",
+}
+
+# Rows converted to Python values at once, the memory used by the writers is bound by it
+CHUNK_SIZE = 10000
+
+
+def result_format(path):
+    """Return the format of the results file by its extension, None if it is unknown."""
+    ext = os.path.splitext(str(path))[1].lstrip(".").lower()
+    return RESULT_FORMATS.get(ext)
+
+
+def _value(value):
+    # Cells of openpyxl and rows of sqlite3 take plain Python values, NaN is left empty
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+
+def _labels(label, levels):
+    return list(label) if levels > 1 else [label]
+
+
+def _chunks(frame, chunk_size):
+    for start in range(0, len(frame), chunk_size):
+        yield frame.iloc[start : start + chunk_size]
+
+
+def _flat_columns(frame):
+    # Columnar formats need one level of string column names of one type each
+    frame = frame.copy()
+    for column in frame.columns[frame.dtypes == object]:
+        frame[column] = frame[column].astype("string")
+    frame.columns = [
+        " / ".join(map(str, column)) if isinstance(column, tuple) else str(column)
+        for column in frame.columns
+    ]
+    return frame.reset_index()
+
+
+def write_xlsx(frame, path, chunk_size=CHUNK_SIZE):
+    """
+    Stream the rows to a write-only workbook, with the layout of DataFrame.to_excel.
+
+    Labels of MultiIndex columns are repeated instead of merged, the app reads both.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    index_levels = frame.index.nlevels
+    if isinstance(frame.columns, pd.MultiIndex):
+        for level in range(frame.columns.nlevels):
+            sheet.append(
+                [None] * index_levels
+                + [_value(label) for label in frame.columns.get_level_values(level)]
+            )
+        if any(name is not None for name in frame.index.names):
+            sheet.append(list(frame.index.names) + [None] * len(frame.columns))
+    else:
+        sheet.append(
+            list(frame.index.names) + [_value(label) for label in frame.columns]
+        )
+    for chunk in _chunks(frame, chunk_size):
+        for label, row in zip(chunk.index, chunk.itertuples(index=False, name=None)):
+            sheet.append(
+                [_value(v) for v in _labels(label, index_levels)]
+                + [_value(v) for v in row]
+            )
+    workbook.save(path)
+
+
+def write_csv(frame, path, chunk_size=CHUNK_SIZE):
+    """Write the rows in chunks."""
+    frame.to_csv(path, chunksize=chunk_size)
+
+
+def write_parquet(frame, path, chunk_size=CHUNK_SIZE):
+    """Write every chunk as a row group, column names are joined with " / "."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in _chunks(frame, chunk_size):
+            chunk = _flat_columns(chunk)
+            if writer is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            )
+        if writer is None:
+            _flat_columns(frame).to_parquet(path, index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_feather(frame, path, chunk_size=CHUNK_SIZE):
+    """Write the table, column names are joined with " / "."""
+    _flat_columns(frame).to_feather(path)
+
+
+def write_sqlite(frame, path, chunk_size=CHUNK_SIZE):
+    """
+    Append the results to the gradebook table of an SQLite file, one row per cell.
+
+    Rows are never updated, every export adds its cells with the export time, so the
+    history of the grades stays in the file.
+    """
+    import sqlite3
+
+    exported_at = datetime.now().isoformat(sep=" ", timespec="seconds")
+    columns = [
+        (str(c[0]), str(c[-1])) if isinstance(c, tuple) else ("", str(c))
+        for c in frame.columns
+    ]
+    with contextlib.closing(sqlite3.connect(path)) as connection, connection:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS gradebook "
+            "(exported_at TEXT, id TEXT, section TEXT, name TEXT, value)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS gradebook_id ON gradebook (id, section)"
+        )
+        for chunk in _chunks(frame, chunk_size):
+            connection.executemany(
+                "INSERT INTO gradebook VALUES (?, ?, ?, ?, ?)",
+                (
+                    (exported_at, str(label), section, name, _value(value))
+                    for label, row in zip(
+                        chunk.index, chunk.itertuples(index=False, name=None)
+                    )
+                    for (section, name), value in zip(columns, row)
+                ),
+            )
+
+
+WRITERS = {
+    "xlsx": write_xlsx,
+    "csv": write_csv,
+    "parquet": write_parquet,
+    "feather": write_feather,
+    "sqlite": write_sqlite,
+}
+
+
+def write_table(frame, path, file_format=None, chunk_size=CHUNK_SIZE):
+    """
+    Write the results table to a file.
+
+    Parameters:
+        frame (DataFrame): Results, e.g. the match list merged with the results.
+        path (str): Output file.
+        file_format (str): One of WRITERS, the format of the extension of path if None.
+        chunk_size (int): Number of rows converted at once.
+    """
+    file_format = file_format or result_format(path)
+    if file_format not in WRITERS:
+        raise ValueError(
+            f"Unknown results format: {file_format}, possible values: {', '.join(WRITERS)}"
+        )
+    WRITERS[file_format](frame, path, chunk_size)